@@ -0,0 +1,67 @@
+"""bench_import.py: import-time budget of the numeric core.
+
+Run from the root of the repository:
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget 0.3
+
+`import buckinghampy` is timed in fresh interpreters, and the best time is checked against the budget. The script
+also checks that SymPy, tabulate, IPython and ipywidgets were not imported along with it, since they are only needed
+to display results. It exits with status 1 when either check fails.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# modules that must only be imported on first use
+LAZY_MODULES = ['sympy', 'tabulate', 'IPython', 'ipywidgets', 'scipy']
+
+PROBE = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import buckinghampy
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+'''
+
+
+def time_import():
+    '''
+    Time `import buckinghampy` in a fresh interpreter, and list the lazy modules that it imported anyway.
+    '''
+    probe = PROBE.format(root=ROOT, lazy=LAZY_MODULES)
+    output = subprocess.run([sys.executable, '-c', probe], check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+    return json.loads(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the import time of buckinghampy against a budget.')
+    parser.add_argument('--budget', type=float, default=0.5,
+                        help='maximum import time in seconds (default: 0.5)')
+    parser.add_argument('--repeat', type=int, default=5, help='keep the best of this many imports (default: 5)')
+    args = parser.parse_args(argv)
+
+    runs = [time_import() for _ in range(args.repeat)]
+    best = min(run['seconds'] for run in runs)
+    loaded = sorted(set(module for run in runs for module in run['loaded']))
+    print('import buckinghampy: {:.4f}s (budget {:.4f}s)'.format(best, args.budget))
+
+    status = 0
+    if loaded:
+        print('imported eagerly: {}'.format(', '.join(loaded)))
+        status = 1
+    if best > args.budget:
+        print('import time is over budget')
+        status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""bench_pipeline.py: benchmarks of the generate_pi_terms pipeline, with per-stage timings.
+
+Run from the root of the repository:
+
+    python benchmarks/bench_pipeline.py --output bench.json
+    python benchmarks/bench_pipeline.py --compare bench.json
+
+Every case is a synthetic problem. The benchmark reports the wall time of every stage of generate_pi_terms and of
+the print paths, the peak memory of a full solve and the number of sets generated per second. With --compare, the
+stage timings are checked against a stored baseline and the script exits with status 1 when a stage got slower than
+the tolerance allows.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from buckinghampy import BuckinghamPi
+
+DIMENSION_NAMES = 'mltkanj'
+
+# stages of BuckinghamPi.generate_pi_terms, as recorded by its instrumentation
+STAGES = ['create_M', 'solve_null_spaces', 'rm_duplicated_powers', 'construct_pi_term_sets']
+
+CASES = [
+    # name, number of variables, number of dimensions, fraction of singular-heavy columns, flagged
+    ('small-flagged', 8, 3, 0.0, True),
+    ('small-unflagged', 8, 3, 0.0, False),
+    ('medium-flagged', 16, 4, 0.0, True),
+    ('medium-unflagged', 16, 4, 0.0, False),
+    ('medium-singular-heavy', 16, 4, 0.5, False),
+    ('large-flagged', 32, 5, 0.0, True),
+    ('large-singular-heavy', 32, 5, 0.5, True),
+    ('wide-unflagged', 24, 7, 0.25, False),
+]
+
+
+def make_problem(num_variables, num_dimensions, singular_fraction=0.0, flagged=True, seed=0):
+    '''
+    Build a synthetic problem. A `singular_fraction` of the variables reuse, or scale, the dimensions of an earlier
+    variable, which makes many repeating sets rank deficient.
+    '''
+    rng = random.Random(seed)
+    dims = DIMENSION_NAMES[:num_dimensions]
+    problem = BuckinghamPi(instrument=True)
+    columns = []
+    for idx in range(num_variables):
+        if columns and rng.random() < singular_fraction:
+            scale = rng.choice([1, 2, -1])
+            exponents = [scale * e for e in rng.choice(columns)]
+        elif idx < num_dimensions:
+            # make sure every dimension is used, so that M has full rank
+            exponents = [int(i == idx) for i in range(num_dimensions)]
+        else:
+            exponents = [rng.choice([-3, -2, -1, 0, 0, 1, 2, 3]) for _ in range(num_dimensions)]
+            if not any(exponents):
+                exponents[rng.randrange(num_dimensions)] = 1
+        columns.append(exponents)
+        dimensions = '*'.join('{}^({})'.format(d, e) for d, e in zip(dims, exponents) if e != 0)
+        problem.add_variable('v{}'.format(idx), dimensions, non_repeating=(flagged and idx == num_variables - 1))
+    return problem
+
+
+def run_case(num_variables, num_dimensions, singular_fraction, flagged, repeat=3, seed=0):
+    best = None
+    for _ in range(repeat):
+        problem = make_problem(num_variables, num_dimensions, singular_fraction, flagged, seed)
+        problem.reset_stats()
+        start = time.perf_counter()
+        result = problem.generate_pi_terms()
+        elapsed = time.perf_counter() - start
+        stats = problem.stats
+        timings = {stage: stats['timings'].get(stage, 0.0) for stage in STAGES}
+        timings['generate_pi_terms'] = elapsed
+
+        start = time.perf_counter()
+        problem.return_all(latex_string=True)
+        timings['latex'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            problem._BuckinghamPi__tabulate_print(latex_string=True)
+        timings['tabulate_print'] = time.perf_counter() - start
+
+        if best is None:
+            best = timings
+        else:
+            best = {stage: min(best[stage], timings[stage]) for stage in timings}
+
+    problem = make_problem(num_variables, num_dimensions, singular_fraction, flagged, seed)
+    tracemalloc.start()
+    problem.generate_pi_terms()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'num_variables': num_variables,
+        'num_dimensions': num_dimensions,
+        'singular_fraction': singular_fraction,
+        'flagged': flagged,
+        'num_sets': len(result),
+        'stages': best,
+        'counters': stats['counters'],
+        'peak_memory_bytes': peak_memory,
+        'sets_per_second': len(result) / best['generate_pi_terms'] if best['generate_pi_terms'] else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    '''
+    Print the ratio of every stage timing to the baseline and return the list of regressions.
+    '''
+    regressions = []
+    for name, case in results['cases'].items():
+        if name not in baseline['cases']:
+            continue
+        for stage, seconds in case['stages'].items():
+            reference = baseline['cases'][name]['stages'].get(stage)
+            if not reference:
+                continue
+            ratio = seconds / reference
+            flag = ''
+            # timings below a millisecond are too noisy to be judged
+            if ratio > 1 + tolerance and seconds > 1e-3:
+                flag = '  <-- regression'
+                regressions.append((name, stage, ratio))
+            print('{:<24} {:<24} {:>10.4f}s {:>7.2f}x{}'.format(name, stage, seconds, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the generate_pi_terms pipeline.')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare the results against this baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative slowdown of a stage that counts as a regression (default: 0.25)')
+    parser.add_argument('--repeat', type=int, default=3, help='keep the best of this many runs (default: 3)')
+    parser.add_argument('--cases', nargs='*', help='only run these cases')
+    args = parser.parse_args(argv)
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cases': {},
+    }
+    for name, num_variables, num_dimensions, singular_fraction, flagged in CASES:
+        if args.cases and name not in args.cases:
+            continue
+        case = run_case(num_variables, num_dimensions, singular_fraction, flagged, args.repeat)
+        results['cases'][name] = case
+        print('{:<24} {:>6} sets {:>9.4f}s {:>10.1f} sets/s {:>8.1f} KiB peak'.format(
+            name, case['num_sets'], case['stages']['generate_pi_terms'], case['sets_per_second'],
+            case['peak_memory_bytes'] / 1024))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('{} stage(s) regressed beyond {:.0%}'.format(len(regressions), args.tolerance))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,6 @@
 from .buckinghampi import BuckinghamPi
+from .piterms import PiTermSets
+from .batch import solve_many, BatchResult
+from .cache import ResultCache
+from .evaluate import evaluate_pi_terms, evaluate_pi_terms_to_files
 from .buckinghampigui import BuckinghamPiGui
\ No newline at end of file
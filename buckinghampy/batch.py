@@ -0,0 +1,180 @@
+"""batch.py: solve many independent pi-theorem problems across a pool of worker processes."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+
+from .buckinghampi import BuckinghamPi
+from .piterms import PiTermSets
+
+
+class BatchResult(namedtuple('BatchResult', ['index', 'variables', 'exponents', 'denominators',
+                                             'prefixed_dimensionless_terms', 'error'])):
+    '''
+    Outcome of one problem of a batch. On success, `exponents` and `denominators` hold the arrays of a PiTermSets
+    and `error` is None; on failure only `index` and `error` are set.
+    '''
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def pi_term_sets(self):
+        '''
+        Rebuild the PiTermSets of a successful problem, to get its SymPy or LaTeX forms.
+        '''
+        if not self.ok:
+            raise Exception('problem {} failed: {}'.format(self.index, self.error))
+        return PiTermSets(self.variables, self.exponents, self.denominators, self.prefixed_dimensionless_terms)
+
+
+def _add_variables(problem, spec):
+    '''
+    Add the variables of a problem spec, given as a mapping of name to either a dimension string, a
+    (dimensions, non_repeating) pair or a {'dimensions': ..., 'non_repeating': ...} dict.
+    '''
+    for name, var in spec.items():
+        if isinstance(var, str):
+            problem.add_variable(name=name, dimensions=var)
+        elif isinstance(var, dict):
+            problem.add_variable(name=name, dimensions=var['dimensions'],
+                                 non_repeating=var.get('non_repeating', False))
+        else:
+            dimensions, non_repeating = var
+            problem.add_variable(name=name, dimensions=dimensions, non_repeating=non_repeating)
+
+
+def _solve_one(index, spec, exact):
+    try:
+        problem = BuckinghamPi()
+        _add_variables(problem, spec)
+        result = problem.generate_pi_terms(exact=exact)
+        return BatchResult(index, result.variables, result.exponents, result.denominators,
+                           result.prefixed_dimensionless_terms, None)
+    except Exception as e:
+        return BatchResult(index, None, None, None, None, '{}: {}'.format(type(e).__name__, e))
+
+
+def _solve_chunk(chunk, exact):
+    return [_solve_one(index, spec, exact) for index, spec in chunk]
+
+
+def _error_results(chunk, e):
+    return [BatchResult(index, None, None, None, None, '{}: {}'.format(type(e).__name__, e)) for index, _ in chunk]
+
+
+def _solve_alone(chunk, exact):
+    '''
+    Solve the problems of a chunk one at a time, each alone in a worker process, so that a problem that kills its
+    worker is the only one to fail.
+    '''
+    results = []
+    executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        for problem in chunk:
+            try:
+                results.extend(executor.submit(_solve_chunk, [problem], exact).result())
+            except BrokenProcessPool as e:
+                results.extend(_error_results([problem], e))
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=1)
+    finally:
+        executor.shutdown()
+    return results
+
+
+def solve_many(problems, max_workers=None, chunksize=16, ordered=True, exact=False):
+    '''
+    Solve many independent problems, fanning them out over a process pool.
+    Problems are read lazily from `problems` and at most two chunks per worker are in flight at any time.
+    A failing problem is reported through the `error` field of its result and does not abort the batch. When a
+    problem kills its worker process, the pool is replaced and the other chunks that were in flight on it are solved
+    again; a chunk that was in flight on two broken pools is solved one problem at a time, so that only the problem
+    that kills its worker gets an error.
+    :param problems: (iterable) problem specs, each a mapping of variable name to either a dimension string, a
+                     (dimensions, non_repeating) pair or a {'dimensions': ..., 'non_repeating': ...} dict.
+    :param max_workers: (int) number of worker processes; defaults to the number of CPUs. With 1 the problems are
+                        solved in the calling process.
+    :param chunksize: (int) number of problems sent to a worker at once.
+    :param ordered: (boolean) yield the results in the order of `problems` instead of as they complete.
+    :param exact: (boolean) solve the null spaces with exact integer arithmetic.
+    :return: (generator) of BatchResult.
+    '''
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    problems = enumerate(problems)
+    chunks = iter(lambda: list(islice(problems, chunksize)), [])
+
+    if max_workers <= 1:
+        for chunk in chunks:
+            yield from _solve_chunk(chunk, exact)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        pending = {}  # future -> (position, chunk, number of broken pools it was in flight on, executor)
+        retries = deque()  # (position, chunk, number of broken pools) of the chunks to submit again
+        done_chunks = {}  # position of the chunk -> results, when ordered
+        next_chunk = 0
+        submitted = 0
+        exhausted = False
+        while True:
+            while len(pending) < 2 * max_workers:
+                if retries:
+                    position, chunk, broken = retries.popleft()
+                else:
+                    chunk = None if exhausted else next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    position, broken = submitted, 0
+                    submitted += 1
+                try:
+                    future = executor.submit(_solve_chunk, chunk, exact)
+                except BrokenProcessPool:
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(max_workers=max_workers)
+                    future = executor.submit(_solve_chunk, chunk, exact)
+                pending[future] = (position, chunk, broken, executor)
+            if not pending:
+                return
+
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                position, chunk, broken, future_executor = pending.pop(future)
+                try:
+                    results = future.result()
+                except BrokenProcessPool as e:
+                    # a worker died: every chunk in flight on its pool fails, whichever problem killed it
+                    if future_executor is executor:
+                        executor.shutdown(wait=False)
+                        executor = ProcessPoolExecutor(max_workers=max_workers)
+                    if broken == 0:
+                        retries.append((position, chunk, 1))
+                        continue
+                    results = _solve_alone(chunk, exact)
+                except Exception as e:
+                    results = _error_results(chunk, e)
+                if ordered:
+                    done_chunks[position] = results
+                else:
+                    yield from results
+
+            while next_chunk in done_chunks:
+                yield from done_chunks.pop(next_chunk)
+                next_chunk += 1
+    finally:
+        executor.shutdown()
@@ -10,86 +10,133 @@ __maintainer__ = "Mokbel Karam and Tony Saad"
 __email__ = "saadtony@gmail.com"
 __status__ = "Production"
 
-import sympy as sp
-from sympy.parsing.sympy_parser import parse_expr
-from sympy.core.mul import Mul, Pow
-from sympy.core.expr import Expr
 import numpy as np
-from fractions import Fraction
-from itertools import combinations
-from tabulate import tabulate
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import chain
 
-# scipy.linalg.null_space uses a robust SVD-based algorithm and is orders of
-# magnitude faster than sympy's exact rational nullspace for our purposes.
-from scipy.linalg import null_space as scipy_null_space
+from .lazy import LazyModule
+from .dimensions import parse_dimensions
+from .nullspace import iter_null_spaces_for_flagged_variable, solve_null_spaces_for_flagged_variable, SolveCache, \
+    SINGULAR_MESSAGE
+from .piterms import PiTermSets
+from .instrumentation import Stats, NULL_STATS
+from .registry import VariableRegistry
 
-try:
-    from IPython.display import display, clear_output, Math, Markdown
-except:
-    pass
+# SymPy, tabulate and IPython are only needed to display the results, so they are imported on first use
+sp = LazyModule('sympy')
 
 
 class BuckinghamPi:
-    def __init__(self):
+    def __init__(self, instrument=False, stats_callback=None):
         '''
         Construct an instance of the BuckinghamPi theorem
+        :param instrument: (boolean) record the wall time of every stage and counters of the work done, see `stats`.
+        :param stats_callback: (callable) called as stats_callback(kind, name, value) for every stage timing (kind
+                               'stage', in seconds) and counter increment (kind 'counter'). Implies `instrument`.
         '''
-        self.__var_from_idx = {}
-        self.__idx_from_var = {}
-        self.__variables = {}
-        self.__sym_variables = {}
+        self.__registry = VariableRegistry()
         self.__flagged_var = {'var_name': None, 'var_index': None, 'selected': False}
 
         self.__null_spaces = []
 
-        self.__fundamental_vars_used = []  # list of fundamental variables being used
-
         self.__prefixed_dimensionless_terms = []
 
         self.__flagged_var_max_sets = 20
+        self.__repeating_set_search = 'lexicographic'
+        self.__repeating_set_score = None
+
+        self.__exact = False
+
+        self.M = None
+        # factorizations and null spaces of the repeating sets of the last solve, reused by the next one
+        self.__solve_cache = SolveCache()
+
+        self.__stats = Stats(stats_callback) if (instrument or stats_callback is not None) else NULL_STATS
+
+    @property
+    def stats(self):
+        '''
+        timings (in seconds) and counters recorded since the instance was created or reset_stats was called, empty
+        unless the instance was constructed with instrument=True.
+        '''
+        return self.__stats.as_dict()
+
+    @property
+    def stats_callback(self):
+        return self.__stats.callback if self.__stats.enabled else None
+
+    @stats_callback.setter
+    def stats_callback(self, callback):
+        if self.__stats.enabled:
+            self.__stats.callback = callback
+        elif callback is not None:
+            self.__stats = Stats(callback)
+
+    def reset_stats(self):
+        self.__stats.reset()
 
     @property
     def fundamental_variables(self):
-        return self.__fundamental_vars_used
+        return [sp.symbols(dim) for dim in self.__registry.dims]
+
+    @property
+    def flagged_var_max_sets(self):
+        '''
+        maximum number of sets of dimensionless groups per non-repeating variable, -1 to get all the sets.
+        '''
+        return self.__flagged_var_max_sets
+
+    @flagged_var_max_sets.setter
+    def flagged_var_max_sets(self, value: int):
+        self.__flagged_var_max_sets = value
+
+    @property
+    def repeating_set_search(self):
+        '''
+        order in which the repeating sets are taken, up to flagged_var_max_sets of them: 'lexicographic' (the default)
+        in the order the variables were added, or 'ranked' by increasing total cost of their variables, see
+        repeating_set_score.
+        '''
+        return self.__repeating_set_search
+
+    @repeating_set_search.setter
+    def repeating_set_search(self, value: str):
+        if value not in ('lexicographic', 'ranked'):
+            raise Exception("the repeating set search has to be either 'lexicographic' or 'ranked'.")
+        self.__repeating_set_search = value
+
+    @property
+    def repeating_set_score(self):
+        '''
+        cost of a variable in a repeating set for the 'ranked' search, as a callable score(name, exponents) where
+        exponents is the dict of the exponents of its fundamental dimensions. A set costs the sum of the costs of its
+        variables, and the cheapest sets are taken first. None (the default) uses the sum of the absolute exponents,
+        which favours the variables with the simplest dimensions and so pi terms with small exponents.
+        '''
+        return self.__repeating_set_score
+
+    @repeating_set_score.setter
+    def repeating_set_score(self, score):
+        self.__repeating_set_score = score
+
+    def __repeating_set_costs(self):
+        if self.__repeating_set_search != 'ranked':
+            return None
+        if self.__repeating_set_score is None:
+            return np.abs(self.M).sum(axis=0).astype(float)
+        registry = self.__registry
+        return np.array([float(self.__repeating_set_score(name, registry.exponents(name))) for name in registry.names])
 
     @property
     def variables(self):
-        return self.__variables
-
-    def __parse_expression(self, string: str):
-        if '^' in string:
-            string = string.replace('^', '**')
-
-        expr = parse_expr(string.lower())
-
-        if not (isinstance(expr, Mul) or isinstance(expr, Pow) or isinstance(expr, sp.Symbol)):
-            raise Exception('expression of type {} is not of the accepted types ({}, {}, {})'.format(
-                type(expr), Mul, Pow, sp.Symbol))
-        if expr.as_coeff_Mul()[0] != 1:
-            raise Exception('cannot have coefficients, {}, that multiply the expression {}'.format(
-                expr.as_coeff_Mul()[0], expr.as_coeff_Mul()[1]))
-
-        used_symbols = list(expr.free_symbols)
-        for sym in used_symbols:
-            if not sym in self.__fundamental_vars_used:
-                self.__fundamental_vars_used.append(sym)
-
-        return expr
-
-    def __extract_exponents(self, expr: Expr):
-        num_physical_dimensions = len(self.__fundamental_vars_used)
-        vect = np.zeros(num_physical_dimensions)
-        args = list(expr.args) if list(expr.args) else [expr]
-        if isinstance(expr, Pow):
-            vect[self.__fundamental_vars_used.index(args[0])] = int(args[1])
-        else:
-            for e in args:
-                if isinstance(expr, sp.Symbol):
-                    vect[self.__fundamental_vars_used.index(e)] = int(1)
-                else:
-                    var, exponent = e.as_base_exp()
-                    vect[self.__fundamental_vars_used.index(var)] = int(exponent)
-        return vect
+        variables = {}
+        for var_name in self.__registry.names:
+            expr = 1
+            for dim, exponent in self.__registry.exponents(var_name).items():
+                expr *= sp.symbols(dim) ** exponent
+            variables[var_name] = expr
+        return variables
 
     def add_variable(self, name: str, dimensions: str, non_repeating=False):
         '''
@@ -101,188 +148,260 @@ class BuckinghamPi:
                               This will ensure that the selected variable only shows up in one dimensionless group.
         '''
         if dimensions != "1":
-            expr = self.__parse_expression(dimensions)
-            self.__variables.update({name: expr})
-            var_idx = len(list(self.__variables.keys())) - 1
-            self.__var_from_idx[var_idx] = name
-            self.__idx_from_var[name] = var_idx
-            if non_repeating and (self.__flagged_var['selected'] == False):
+            with self.__stats.stage('parse_dimensions'):
+                exponents = dict(parse_dimensions(dimensions))
+            if non_repeating and (self.__flagged_var['selected'] == True):
+                raise Exception("you cannot select more than one variable at a time to be a non_repeating.")
+            var_idx = self.__registry.add(name, exponents)
+            if non_repeating:
                 self.__flagged_var['var_name'] = name
                 self.__flagged_var['var_index'] = var_idx
                 self.__flagged_var['selected'] = True
-            elif non_repeating and (self.__flagged_var['selected'] == True):
-                raise Exception("you cannot select more than one variable at a time to be a non_repeating.")
         else:
-            self.__prefixed_dimensionless_terms.append(sp.symbols(name))
+            self.__prefixed_dimensionless_terms.append(name)
+
+    def remove_variable(self, name: str):
+        '''
+        Remove a variable that was previously added. The next call to generate_pi_terms only recomputes the repeating
+        sets whose columns changed.
+        :param name: (string) name of the variable to be removed
+        '''
+        if name in self.__prefixed_dimensionless_terms:
+            self.__prefixed_dimensionless_terms.remove(name)
+            return
+        if name not in self.__registry:
+            raise Exception("the variable {} does not exist.".format(name))
+        col = self.__registry.index[name]
+        self.__registry.remove(name)
+        self.__solve_cache.remove_column(col)
+        if self.__flagged_var['var_name'] == name:
+            self.__flagged_var = {'var_name': None, 'var_index': None, 'selected': False}
+        elif self.__flagged_var['selected'] == True:
+            self.__flagged_var['var_index'] = self.__registry.index[self.__flagged_var['var_name']]
+
+    def update_variable(self, name: str, dimensions: str, non_repeating=None):
+        '''
+        Change the dimensions of a variable that was previously added, keeping its position. The next call to
+        generate_pi_terms only recomputes the repeating sets whose columns changed.
+        :param name: (string) name of the variable to be updated
+        :param dimensions: (string) new expression of the variable in terms of the fundamental dimensions.
+        :param non_repeating: (boolean) new non-repeating selection of the variable; None keeps the current one.
+        '''
+        if non_repeating is None:
+            non_repeating = self.__flagged_var['var_name'] == name
+        if name in self.__prefixed_dimensionless_terms or dimensions == "1":
+            # the variable moves between the dimensional and the dimensionless ones, validate the new state before
+            # touching the current one
+            if dimensions != "1":
+                if non_repeating and self.__flagged_var['selected'] == True:
+                    raise Exception("you cannot select more than one variable at a time to be a non_repeating.")
+                parse_dimensions(dimensions)
+            self.remove_variable(name)
+            self.add_variable(name, dimensions, non_repeating)
+            return
+        if name not in self.__registry:
+            raise Exception("the variable {} does not exist.".format(name))
+        if non_repeating and self.__flagged_var['selected'] == True and self.__flagged_var['var_name'] != name:
+            raise Exception("you cannot select more than one variable at a time to be a non_repeating.")
+
+        with self.__stats.stage('parse_dimensions'):
+            exponents = dict(parse_dimensions(dimensions))
+        self.__registry.update(name, exponents)
+        if non_repeating:
+            self.__flagged_var = {'var_name': name, 'var_index': self.__registry.index[name], 'selected': True}
+        elif self.__flagged_var['var_name'] == name:
+            self.__flagged_var = {'var_name': None, 'var_index': None, 'selected': False}
 
     def __create_M(self):
-        self.num_variable = len(list(self.__variables.keys()))
-        num_physical_dimensions = len(self.__fundamental_vars_used)
+        self.num_variable = len(self.__registry)
+        num_physical_dimensions = len(self.__registry.dims)
         if self.num_variable <= num_physical_dimensions:
             raise Exception('The number of variables has to be greater than the number of physical dimensions.')
+        # a read-only int16 view of the exponents filled in by add_variable, nothing is copied. Later edits of the
+        # variables change it in place, so the solvers copy what they keep.
+        self.M = self.__registry.matrix
 
-        self.M = np.zeros(shape=(self.num_variable, num_physical_dimensions))
-        for var_name in self.__variables.keys():
-            expr = self.__variables[var_name]
-            vect = self.__extract_exponents(expr)
-            row = self.__idx_from_var[var_name]
-            self.M[row, :] = vect
-
-        self.M = self.M.transpose()
-
-    def __create_symbolic_variables(self):
-        for var_name in self.__variables.keys():
-            self.__sym_variables[var_name] = sp.symbols(var_name)
-
-    def __solve_null_spaces(self):
+    def __flagged_indices(self):
         if self.__flagged_var['selected'] == True:
-            self.__solve_null_spaces_for_flagged_variables()
-        else:
-            for idx in self.__var_from_idx.keys():
-                self.__flagged_var['var_name'] = self.__var_from_idx[idx]
-                self.__flagged_var['var_index'] = idx
-                self.__flagged_var['selected'] = True
-                self.__solve_null_spaces_for_flagged_variables()
-
-    def __rationalize_vector(self, vec, max_denominator=1000):
-        """Convert a float numpy vector to a list of sp.Rational using stdlib fractions."""
-        result = []
-        for v in vec:
-            frac = Fraction(float(v)).limit_denominator(max_denominator)
-            result.append(sp.Rational(frac.numerator, frac.denominator))
-        return result
-
-    def __solve_null_spaces_for_flagged_variables(self):
-        assert self.__flagged_var['selected'] == True, "you need to select a variable to be explicit"
-
-        n = self.num_variable
-        m = len(self.__fundamental_vars_used)
-
-        original_indices = list(range(0, n))
-        all_idx = original_indices.copy()
-        if self.__flagged_var['selected']:
-            del all_idx[self.__flagged_var['var_index']]
-
-        all_combs = list(combinations(all_idx, m))[:self.__flagged_var_max_sets]
-
-        num_all_pi_terms = (n - m) * len(all_combs)
-        num_singular = 0
-
-        for comb in all_combs:
-            temp_comb = list(comb).copy()
-            extra_vars = [i for i in original_indices if i not in temp_comb]
-            b_ns = []
-
-            for extra_var in extra_vars:
-                new_order = {}
-                temp_comb.append(extra_var)
-                A = self.M[:, temp_comb].copy()  # shape: (m, n)
-
-                for num, var_idx in enumerate(temp_comb):
-                    new_order[num] = self.__var_from_idx[var_idx]
-
-                # FAST singularity check via numpy determinant (float arithmetic)
-                test_mat = A[:, :m]
-                if abs(np.linalg.det(test_mat)) > 1e-10:
-                    # FAST null space via scipy SVD — much faster than sympy rational arithmetic
-                    ns_float = scipy_null_space(A)  # shape: (n_cols, nullity)
-
-                    for col in range(ns_float.shape[1]):
-                        col_vec = ns_float[:, col]
-                        # Normalize so last-column component is positive (matches SymPy convention)
-                        pivot = col_vec[-1]
-                        if abs(pivot) > 1e-12:
-                            col_vec = col_vec / pivot
-                        rational_vec = self.__rationalize_vector(col_vec)
-                        b_ns.append({'order': new_order, 'power': [[v] for v in rational_vec]})
-                else:
-                    num_singular += 1
-
-                temp_comb = list(comb).copy()
-
-            if b_ns:
-                self.__null_spaces.append(b_ns)
-
-        if num_singular == num_all_pi_terms:
-            raise Exception(
-                "All the P matrices in the possible sets of dimensionless groups were singular, resulting in no pi terms.")
-
-    def __construct_symbolic_pi_terms(self):
-        self.__allpiterms = []
-        for space in self.__null_spaces:
-            spacepiterms = []
-            for term in space:
-                expr = 1
-                for order, power in zip(term['order'].keys(), term['power']):
-                    # power[0] is already sp.Rational — no nsimplify needed
-                    expr *= self.__sym_variables[term['order'][order]] ** power[0]
-                spacepiterms.append(expr)
-            self.__allpiterms.append(spacepiterms)
+            return [self.__flagged_var['var_index']]
+        return list(range(len(self.__registry)))
+
+    def __solve_null_spaces(self, workers=None, pool='thread'):
+        flagged_indices = self.__flagged_indices()
+
+        # worker processes cannot share the cache nor the stats of this instance
+        in_processes = bool(workers) and pool == 'process'
+        cache = None if in_processes else self.__solve_cache
+        stats = NULL_STATS if in_processes else self.__stats
+        solve = partial(solve_null_spaces_for_flagged_variable, self.M, max_sets=self.__flagged_var_max_sets,
+                        exact=self.__exact, cache=cache, stats=stats, costs=self.__repeating_set_costs())
+        if cache is not None:
+            cache.begin(self.M, self.__exact, self.__flagged_var['var_index'])
+        try:
+            if workers and len(flagged_indices) > 1:
+                executor_class = ProcessPoolExecutor if pool == 'process' else ThreadPoolExecutor
+                with executor_class(max_workers=workers) as executor:
+                    # map yields in submission order, so the merge is identical to the serial one
+                    null_spaces = list(executor.map(solve, flagged_indices))
+            else:
+                null_spaces = list(map(solve, flagged_indices))
+        finally:
+            if cache is not None:
+                cache.end()
+
+        for spaces in null_spaces:
+            self.__null_spaces.extend(spaces)
+
+    def __make_pi_term_sets(self, null_spaces):
+        num_sets = len(null_spaces)
+        num_terms = self.num_variable - len(self.__registry.dims)
+        exponents = np.zeros((num_sets, num_terms, self.num_variable), dtype=np.int64)
+        denominators = np.zeros((num_sets, num_terms), dtype=np.int64)
+        # every set has num_terms terms, so the terms of all the sets fill the flattened arrays in order
+        terms = [term for space in null_spaces for term in space]
+        if terms:
+            size = len(terms) * len(terms[0]['order'])
+            orders = np.fromiter(chain.from_iterable([term['order'] for term in terms]), dtype=np.intp,
+                                 count=size).reshape(len(terms), -1)
+            powers = np.fromiter(chain.from_iterable([term['power'] for term in terms]), dtype=np.int64,
+                                 count=size).reshape(len(terms), -1)
+            exponents.reshape(-1, self.num_variable)[np.arange(len(terms))[:, None], orders] = powers
+            # the exponents are integers scaled so that the extra (last) variable has a unit exponent
+            denominators.reshape(-1)[:] = powers[:, -1]
+        return PiTermSets(self.__registry.names, exponents, denominators, self.__prefixed_dimensionless_terms)
+
+    def __construct_pi_term_sets(self):
+        self.__pi_term_sets = self.__make_pi_term_sets(self.__null_spaces)
 
     def __rm_duplicated_powers(self):
         """
-        Hash-based deduplication: O(n_sets) instead of O(n_sets^2 * k!).
+        Hash-based deduplication of the null spaces, done before any symbolic expression is built.
 
-        Each pi-term set is represented as a frozenset of canonical keys where
-        each key is the lexicographically smaller of latex(term) and latex(1/term).
-        This makes the check invariant to both ordering within the set and
-        inversion of individual terms — the same equivalences the original
-        permutation-based algorithm was checking.
+        Each pi-term set is represented by its key, a frozenset of the canonical integer exponent vectors of its
+        terms computed when they were solved, which makes the check invariant to both ordering within the set and
+        inversion of individual terms.
         """
         seen = set()
         unique = []
-        for pi_set in self.__allpiterms:
-            key_parts = set()
-            for term in pi_set:
-                s = sp.latex(term)
-                s_inv = sp.latex(term ** -1)
-                key_parts.add(min(s, s_inv))
-            key = frozenset(key_parts)
-            if key not in seen:
-                seen.add(key)
-                unique.append(pi_set)
-        self.__allpiterms = unique
-
-    def __populate_prefixed_dimensionless_groups(self):
-        for num_set, pi_set in enumerate(self.__allpiterms):
-            for pre_fixed_dimensionless_group in self.__prefixed_dimensionless_terms:
-                self.__allpiterms[num_set].append(pre_fixed_dimensionless_group)
-
-    def generate_pi_terms(self):
+        for space in self.__null_spaces:
+            if space.key not in seen:
+                seen.add(space.key)
+                unique.append(space)
+        self.__stats.count('duplicates_removed', len(self.__null_spaces) - len(unique))
+        self.__null_spaces = unique
+
+    def generate_pi_terms(self, exact=False, workers=None, pool='thread', cache=None):
         '''
         Generates all the possible pi terms.
         Note: this function can throw exceptions.
+        :param exact: (boolean) solve the null spaces with exact integer arithmetic instead of floating point. The
+                      exponents are then exact for any denominator. This takes about twice as long as the float
+                      path, and is still faster than the float path of earlier releases.
+        :param workers: (int) when no variable is flagged as non-repeating, solve the sub-problems of the different
+                        variables on this many workers. The result is identical to the serial one.
+        :param pool: (string) kind of pool used with `workers`, either 'thread' or 'process'.
+        :param cache: (ResultCache) persistent cache to look the solution up in, and to store it in when missing.
+        :return: (PiTermSets) the sets of pi terms, backed by their exponents. SymPy expressions and LaTeX strings
+                 are only built when they are accessed.
         '''
+        stats = self.__stats
+        self.__exact = exact
+        self.__null_spaces = []
+        with stats.stage('create_M'):
+            self.__create_M()
+
+        if cache is not None:
+            with stats.stage('result_cache'):
+                key = cache.key(self.M, self.__flagged_var['var_index'], self.__flagged_var_max_sets, exact,
+                                self.__repeating_set_costs())
+                cached = cache.get(key)
+            if cached is not None:
+                stats.count('result_cache_hits')
+                self.__pi_term_sets = PiTermSets(self.__registry.names, *cached,
+                                                 self.__prefixed_dimensionless_terms)
+                return self.__pi_term_sets
+            stats.count('result_cache_misses')
+
+        with stats.stage('solve_null_spaces'):
+            self.__solve_null_spaces(workers, pool)
+        with stats.stage('rm_duplicated_powers'):
+            self.__rm_duplicated_powers()
+        with stats.stage('construct_pi_term_sets'):
+            self.__construct_pi_term_sets()
+
+        if cache is not None:
+            with stats.stage('result_cache'):
+                cache.put(key, self.__pi_term_sets.exponents, self.__pi_term_sets.denominators)
+        return self.__pi_term_sets
+
+    def iter_pi_terms(self, exact=False, reuse=False):
+        '''
+        Generates the sets of pi terms one at a time, each as soon as it is solved and found not to be a duplicate of
+        an earlier set. The prefixed dimensionless groups are appended to every set. Stopping the iteration early
+        skips the remaining work, and memory does not grow with the number of sets solved.
+        Note: this function can throw exceptions.
+        :param exact: (boolean) solve the null spaces with exact integer arithmetic instead of floating point.
+        :param reuse: (boolean) solve through the cache of the last solve, like generate_pi_terms, so that after an
+                      edit only the repeating sets that changed are solved again. The repeating sets of a variable are
+                      then all found before its first set is yielded, and the results of this solve are kept for the
+                      next one instead of being dropped batch by batch.
+        :return: (generator) of lists of SymPy expressions, in the same order as `pi_terms` after generate_pi_terms.
+        '''
+        self.__exact = exact
         self.__create_M()
-        self.__create_symbolic_variables()
-        self.__solve_null_spaces()
-        self.__construct_symbolic_pi_terms()
-        self.__rm_duplicated_powers()
-        self.__populate_prefixed_dimensionless_groups()
+        costs = self.__repeating_set_costs()
+        cache = self.__solve_cache if reuse else None
+        if cache is not None:
+            cache.begin(self.M, self.__exact, self.__flagged_var['var_index'])
+        try:
+            seen = set()
+            for var_index in self.__flagged_indices():
+                found = False
+                for space in iter_null_spaces_for_flagged_variable(self.M, var_index, self.__flagged_var_max_sets,
+                                                                   self.__exact, cache, self.__stats, costs):
+                    found = True
+                    if space.key in seen:
+                        self.__stats.count('duplicates_removed')
+                        continue
+                    seen.add(space.key)
+                    yield self.__make_pi_term_sets([space]).pi_terms[0]
+                if not found:
+                    raise Exception(SINGULAR_MESSAGE)
+        finally:
+            # also reached when the iteration is stopped early, which leaves what was solved so far in the cache
+            if cache is not None:
+                cache.end()
 
     @property
     def pi_terms(self):
-        return self.__allpiterms
+        return self.__pi_term_sets.pi_terms
+
+    @property
+    def pi_term_sets(self):
+        return self.__pi_term_sets
 
     def __Jupyter_print(self):
-        for set_num, space in enumerate(self.__allpiterms):
+        from IPython.display import display, Math, Markdown
+        pi_term_sets = self.__pi_term_sets
+        for set_num in range(pi_term_sets.num_sets):
             latex_str = '\\text{Set }'
             latex_str += '{}: \\quad'.format(set_num + 1)
-            for num, term in enumerate(space):
-                latex_str += '\\pi_{} = '.format(num + 1) + sp.latex(term)
+            for num in range(pi_term_sets.num_terms):
+                latex_str += '\\pi_{} = '.format(num + 1) + pi_term_sets.latex(set_num, num)
                 latex_str += '\\quad'
             display(Math(latex_str))
             display(Markdown('---'))
 
     def __get_latex_form(self, latex_string=False):
+        pi_term_sets = self.__pi_term_sets
         latex_form = []
-        for pi_set in self.__allpiterms:
+        for set_num in range(pi_term_sets.num_sets):
             latex_set = []
-            for pi in pi_set:
+            for num in range(pi_term_sets.num_terms):
                 if latex_string:
-                    latex_set.append(sp.latex(pi))
+                    latex_set.append(pi_term_sets.latex(set_num, num))
                 else:
-                    latex_set.append(pi)
+                    latex_set.append(pi_term_sets.term(set_num, num))
             latex_form.append(latex_set)
 
         for num, set in enumerate(latex_form):
@@ -293,21 +412,24 @@ class BuckinghamPi:
     def __tabulate_print(self, latex_string=False):
         latex_sets = self.__get_latex_form(latex_string)
         n = self.num_variable
-        m = len(self.__fundamental_vars_used)
+        m = len(self.__registry.dims)
         num_of_pi_terms = n - m
         headers = ['sets']
         for num in range(num_of_pi_terms):
             headers.append('Pi {}'.format(num + 1))
+        from tabulate import tabulate
         print(tabulate(latex_sets, headers=headers))
 
     def print_all(self, latex_string=False):
         '''
         print all the sets of dimensionless groups in latex or symbolic form.
         '''
-        try:
-            self.__Jupyter_print()
-        except:
-            self.__tabulate_print(latex_string)
+        with self.__stats.stage('print'):
+            try:
+                self.__Jupyter_print()
+            except:
+                self.__tabulate_print(latex_string)
 
     def return_all(self, latex_string=False):
-        return self.__get_latex_form(latex_string)
+        with self.__stats.stage('print'):
+            return self.__get_latex_form(latex_string)
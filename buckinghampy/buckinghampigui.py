@@ -1,12 +1,11 @@
+import threading
+
 from buckinghampy.buckinghampi import BuckinghamPi,sp
-try:
-    import ipywidgets as widgets
-    from ipywidgets import HBox, VBox, Layout, Box
-    from IPython.display import display, clear_output, Math, Markdown
-except:
-    pass
 
 
+class _Cancelled(Exception):
+    pass
+
 
 class BuckinghamPiGui(object):
 
@@ -16,18 +15,36 @@ class BuckinghamPiGui(object):
         if inJupyter == False:
             raise Exception("Cannot instantiate the class in a non jupyter cell!")
 
+        # ipywidgets and IPython are only loaded once a GUI is created, so that importing buckinghampy stays light
+        global widgets, HBox, VBox, Layout, Box, display, clear_output, Math, Markdown
+        import ipywidgets as widgets
+        from ipywidgets import HBox, VBox, Layout, Box
+        from IPython.display import display, clear_output, Math, Markdown
+
         self.continuousUpdate=True
         self.style = {'description_width': 'initial'}
         self.txt_box_layout = Layout(width='auto', height='32px')
         self.children_vbox = [] # variable list
         self.panels={}
         self.stylingTab()
+        self.controls_panel()
 
+        # every panel is displayed once, and then updated in place
         self.__display(self.panels)
+        self.output = widgets.Output()
+        display(self.output)
 
         self.on_change()
         self.generateButtonPressed = False
 
+        # reused across generations, see generate_solution
+        self.problem = None
+        self.solved_vars = {}
+
+        # background generation
+        self.worker = None
+        self.cancel_event = threading.Event()
+
     def __display(self,obj):
         for key in obj.keys():
             display(obj[key])
@@ -50,6 +67,34 @@ class BuckinghamPiGui(object):
         self.top_panel=HBox(children=[self.num_var])
         self.panels['top_panel']= self.top_panel
 
+        self.bottom_panel = VBox(children=self.children_vbox)
+        self.panels['bottom_panel'] = self.bottom_panel
+
+    def controls_panel(self):
+        self.generate_button_widget = widgets.Button(
+                                                description='Generate',
+                                                disabled=False,
+                                                button_style='', # 'success', 'info', 'warning', 'danger' or ''
+                                                tooltip='Generate',
+                                                icon='check'
+                                            )
+        self.cancel_button_widget = widgets.Button(
+                                                description='Cancel',
+                                                disabled=True,
+                                                button_style='warning',
+                                                tooltip='Cancel the generation',
+                                                icon='times'
+                                            )
+        self.progress = widgets.IntProgress(value=0, min=0, max=1, description='Repeating sets:', style=self.style)
+        self.progress_label = widgets.Label(value='')
+
+        self.generate_button_widget.on_click(self.generate_pressed)
+        self.cancel_button_widget.on_click(self.cancel_pressed)
+
+        self.controls=HBox(children=[self.generate_button_widget, self.cancel_button_widget, self.progress,
+                                     self.progress_label])
+        self.panels['controls'] = self.controls
+
     def create_variable_Hbox(self,idx):
 
         setattr(self, 'var_name_{}'.format(idx),
@@ -85,55 +130,29 @@ class BuckinghamPiGui(object):
 
 
     def create_bottom_panel(self,change):
-        if len(self.children_vbox):
-            del self.children_vbox[-1]
         list_var_num = len(self.children_vbox)
-        print("children v box list",self.children_vbox)
-        print("list variable number ",list_var_num)
-        print("variable number ",self.num_var.value)
         counter = list_var_num
         while counter < self.num_var.value:
             counter += 1
             self.create_variable_Hbox(counter)
             self.children_vbox.append(getattr(self, 'var_{}'.format(counter)))
-
+            getattr(self, 'var_select_{}'.format(counter)).observe(self.var_checkboxes_enable, names='value')
 
         counter = list_var_num
         while counter > self.num_var.value:
             del self.children_vbox[-1]
+            getattr(self, 'var_{}'.format(counter)).close()
             delattr(self,'var_{}'.format(counter))
             delattr(self, 'var_name_{}'.format(counter))
             delattr(self, 'var_dimensions_{}'.format(counter))
             delattr(self,'var_select_{}'.format(counter))
             counter -= 1
 
-        self.generate_button_widget = widgets.Button(
-                                                description='Generate',
-                                                disabled=False,
-                                                button_style='', # 'success', 'info', 'warning', 'danger' or ''
-                                                tooltip='Generate',
-                                                icon='check'
-                                            )
-
-        self.children_vbox.append(self.generate_button_widget)
-
-        self.bottom_panel = \
-            VBox(children=self.children_vbox)
+        # only the rows that were added or removed change, the rest of the widgets stay as they are
+        self.bottom_panel.children = tuple(self.children_vbox)
 
         self.uncheck_chk_boxes()
 
-        self.panels['bottom_panel'] = self.bottom_panel
-        clear_output()
-        self.__display(self.panels)
-        self.output = widgets.Output()
-        display(self.output)
-
-        for idx in range(1,self.num_var.value+1):
-            select_obj = getattr(self, 'var_select_{}'.format(idx))
-            select_obj.observe(self.var_checkboxes_enable, names='value')
-
-        self.generate_button_widget.on_click(self.generate_pressed)
-
     def uncheck_chk_boxes(self):
         all_chk_boxes = [getattr(self, 'var_select_{}'.format(idx)) for idx in range(1, self.num_var.value + 1)]
         chk_boxes_vals = [chk_box.value for chk_box in all_chk_boxes]
@@ -173,33 +192,129 @@ class BuckinghamPiGui(object):
 
             self.data['vars'][var_name] = {'dimensions':var_dimensions,'non_repeating':var_select}
 
-    def generate_solution(self):
-        problem = BuckinghamPi()
-        for varname in self.data['vars'].keys():
-            problem.add_variable(name=varname, dimensions=self.data['vars'][varname]['dimensions'],
-                                 non_repeating=self.data['vars'][varname]['non_repeating'])
-        problem.generate_pi_terms()
-        self.data['sol'] = problem.pi_terms
+    def update_problem(self):
+        old_vars = self.solved_vars
+        new_vars = self.data['vars']
+        kept = [name for name in old_vars if name in new_vars]
+        toggled = [name for name in kept
+                   if (old_vars[name]['dimensions'] == "1") != (new_vars[name]['dimensions'] == "1")]
+        if self.problem is None or kept != list(new_vars)[:len(kept)] or toggled:
+            # the variables were reordered or moved between the dimensional and dimensionless ones,
+            # start from a new problem
+            self.problem = BuckinghamPi()
+            old_vars = {}
+            kept = []
+
+        for varname in old_vars:
+            if varname not in new_vars:
+                self.problem.remove_variable(varname)
+        # release the non-repeating selection before moving it to another variable
+        changed = [varname for varname in kept if new_vars[varname] != old_vars[varname]]
+        changed.sort(key=lambda varname: new_vars[varname]['non_repeating'])
+        for varname in changed:
+            self.problem.update_variable(name=varname, dimensions=new_vars[varname]['dimensions'],
+                                         non_repeating=new_vars[varname]['non_repeating'])
+        for varname in new_vars:
+            if varname not in old_vars:
+                self.problem.add_variable(name=varname, dimensions=new_vars[varname]['dimensions'],
+                                          non_repeating=new_vars[varname]['non_repeating'])
+        self.solved_vars = {varname: dict(var) for varname, var in new_vars.items()}
+
+    def generate_solution(self, on_set=None):
+        '''
+        Solve the problem described by the widgets, streaming the sets of pi terms as they are found.
+        :param on_set: (callable) called as on_set(set_num, pi_terms) for every set, as soon as it is found.
+        '''
+        try:
+            self.update_problem()
+        except Exception:
+            # a failed edit can leave the problem half updated
+            self.problem = None
+            self.solved_vars = {}
+            raise
+        self.progress.max = max(self.num_repeating_sets(), 1)
+        self.problem.stats_callback = self.on_stats
+        self.data['sol'] = []
+        # through the cache of the last generation, so that editing one variable only re-solves what changed
+        pi_term_sets = self.problem.iter_pi_terms(reuse=True)
+        try:
+            for pi_terms in pi_term_sets:
+                self.data['sol'].append(pi_terms)
+                if on_set is not None:
+                    on_set(len(self.data['sol']) - 1, pi_terms)
+        finally:
+            # a cancelled generation releases the cache right away
+            pi_term_sets.close()
+
+    def num_repeating_sets(self):
+        '''
+        Upper bound on the number of repeating sets the problem will examine, the maximum of the progress bar.
+        '''
+        dimensional = [var for var in self.solved_vars.values() if var['dimensions'] != "1"]
+        num_vars = len(dimensional)
+        num_dims = len(self.problem.fundamental_variables)
+        flagged = any(var['non_repeating'] for var in dimensional)
+        # number of combinations of num_dims of the num_vars - 1 repeating candidates
+        per_var = 1
+        for k in range(min(num_dims, num_vars - 1 - num_dims)):
+            per_var = per_var * (num_vars - 1 - k) // (k + 1)
+        if self.problem.flagged_var_max_sets >= 0:
+            per_var = min(per_var, self.problem.flagged_var_max_sets)
+        return per_var if flagged else per_var * num_vars
+
+    def on_stats(self, kind, name, value):
+        # called from the worker thread by the instrumentation of the problem
+        if self.cancel_event.is_set():
+            raise _Cancelled()
+        if kind == 'counter' and name == 'combinations_examined':
+            self.progress.value = min(self.progress.value + value, self.progress.max)
 
     def generate_pressed(self, *args):
+        if self.worker is not None and self.worker.is_alive():
+            return
         self.collect_data()
 
+        # cleared through its state rather than clear_output, which only works from the kernel thread
+        self.output.outputs = ()
+        self.cancel_event.clear()
+        self.progress.value = 0
+        self.progress_label.value = ''
+        self.generate_button_widget.disabled = True
+        self.cancel_button_widget.disabled = False
+        self.worker = threading.Thread(target=self.generate_worker, daemon=True)
+        self.worker.start()
+
+    def cancel_pressed(self, *args):
+        self.cancel_event.set()
+
+    def generate_worker(self):
+        def on_set(set_num, pi_terms):
+            self.progress_label.value = '{} sets'.format(set_num + 1)
+            self.output.append_display_data(Math(self.set_latex(set_num, pi_terms)))
+            self.output.append_display_data(Markdown('---'))
+            if self.cancel_event.is_set():
+                raise _Cancelled()
+
         try:
-            self.generate_solution()
-            with self.output:
-                clear_output()
-                self.print()
+            self.generate_solution(on_set)
+            self.progress.value = self.progress.max
+        except _Cancelled:
+            self.output.append_stdout('Cancelled after {} sets.\n'.format(len(self.data.get('sol', []))))
         except Exception as e:
-            with self.output:
-                clear_output()
-                print(e)
+            self.output.append_stdout('{}\n'.format(e))
+        finally:
+            self.generate_button_widget.disabled = False
+            self.cancel_button_widget.disabled = True
+
+    def set_latex(self, set_num, pi_terms):
+        latex_str= '\\text{Set }'
+        latex_str+='{}: \\quad'.format(set_num+1)
+        for num, term in enumerate(pi_terms):
+            latex_str += '\\pi_{} = '.format(num+1)+sp.latex(term)
+            latex_str += '\\quad'
+        return latex_str
 
     def print(self):
         for set_num, space in enumerate(self.data['sol']):
-            latex_str= '\\text{Set }'
-            latex_str+='{}: \\quad'.format(set_num+1)
-            for num, term in enumerate(space):
-                latex_str += '\\pi_{} = '.format(num+1)+sp.latex(term)
-                latex_str += '\\quad'
-            display(Math(latex_str))
+            display(Math(self.set_latex(set_num, space)))
             display(Markdown('---'))
\ No newline at end of file
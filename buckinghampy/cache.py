@@ -0,0 +1,101 @@
+"""cache.py: a persistent on-disk cache of the solved pi term exponents, keyed by the dimension matrix."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import hashlib
+import io
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+
+# bump when the layout of the stored exponents or the way they are solved changes
+_FORMAT_VERSION = 1
+
+
+def _to_blob(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _from_blob(blob):
+    return np.load(io.BytesIO(blob), allow_pickle=False)
+
+
+class ResultCache:
+    def __init__(self, path: str, max_entries=10000):
+        '''
+        Construct a persistent cache of solved problems, stored in an SQLite database.
+        Entries are keyed on the dimension matrix, so the same physical system hits the cache whatever the names of
+        its variables and fundamental dimensions are. The least recently used entries are evicted beyond
+        `max_entries`.
+        :param path: (string) path of the SQLite database file, created if it does not exist.
+        :param max_entries: (int) maximum number of problems kept in the cache.
+        '''
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS results ('
+                         'key TEXT PRIMARY KEY, exponents BLOB, denominators BLOB, last_used REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+
+    @staticmethod
+    def key(M, flagged_index, max_sets, exact, costs=None):
+        '''
+        Canonical hash of a problem. The rows of M (the fundamental dimensions) are sorted, since their order and
+        names do not change the solution, while the column order, the flagged variable index, the cap on the number
+        of sets, the solver and the costs of a ranked search are all part of the key.
+        '''
+        M = np.asarray(M, dtype=np.int64)
+        rows = sorted(map(tuple, M.tolist()))
+        canonical = (_FORMAT_VERSION, M.shape, rows, flagged_index, max_sets, bool(exact))
+        if costs is not None:
+            canonical += (np.asarray(costs, dtype=float).tolist(),)
+        canonical = repr(canonical)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def __len__(self):
+        with closing(sqlite3.connect(self.path)) as conn:
+            return conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def get(self, key):
+        '''
+        Return the (exponents, denominators) arrays stored under `key`, or None.
+        The exponents are over the variables in the column order of M, so they map onto the caller's variable names
+        by position.
+        '''
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            row = conn.execute('SELECT exponents, denominators FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute('UPDATE results SET last_used = ? WHERE key = ?', (time.time(), key))
+        self.hits += 1
+        return _from_blob(row[0]), _from_blob(row[1])
+
+    def put(self, key, exponents, denominators):
+        '''
+        Store the exponents and denominators of a solved problem under `key`, evicting the least recently used
+        entries beyond max_entries.
+        '''
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                         (key, _to_blob(exponents), _to_blob(denominators), time.time()))
+            conn.execute('DELETE FROM results WHERE key NOT IN '
+                         '(SELECT key FROM results ORDER BY last_used DESC LIMIT ?)', (self.max_entries,))
+
+    def clear(self):
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute('DELETE FROM results')
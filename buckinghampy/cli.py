@@ -0,0 +1,152 @@
+"""cli.py: command-line front end, solving problems read as JSON or JSONL and writing the results as JSONL."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import argparse
+import json
+import os
+import sys
+
+from .batch import solve_many
+
+DESCRIPTION = '''
+Solve dimensional analysis problems read from files or stdin and write one JSON line per problem to stdout.
+
+A problem maps each variable name to its dimensions, given as a string, a [dimensions, non_repeating] pair or a
+{"dimensions": ..., "non_repeating": ...} object, e.g. {"u": "L/T", "rho": "M/L^(3)", "dp": ["M/(L*T^2)", true]}.
+A problem can also be wrapped as {"id": ..., "variables": {...}}, in which case its id is copied to its result.
+
+.json files hold one problem or a list of problems; every other input, stdin included, is read as JSON Lines, one
+problem per line, without being loaded in memory at once. A problem that cannot be read or solved produces a result
+with an "error" field and does not stop the others.
+'''
+
+
+def _read_lines(stream, source):
+    for num, line in enumerate(stream, 1):
+        if line.strip():
+            yield '{}:{}'.format(source, num), line
+
+
+def _read_document(stream, source):
+    try:
+        document = json.load(stream)
+    except ValueError as e:
+        yield source, e
+        return
+    records = document if isinstance(document, list) else [document]
+    for num, record in enumerate(records):
+        yield '{}[{}]'.format(source, num), record
+
+
+def _records(paths, input_format):
+    '''
+    Yield (location, record) for every problem of the inputs, where record is the decoded JSON value, the raw line
+    still to be decoded, or the exception raised while reading it.
+    '''
+    for path in paths or ['-']:
+        document = input_format == 'json' or (input_format == 'auto' and path.endswith('.json'))
+        read = _read_document if document else _read_lines
+        if path == '-':
+            yield from read(sys.stdin, '<stdin>')
+        else:
+            with open(path) as stream:
+                yield from read(stream, path)
+
+
+def _problem(record):
+    '''
+    Return (id, spec) of a problem record, raising an exception when it is malformed.
+    '''
+    if isinstance(record, Exception):
+        raise record
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise Exception('a problem has to be a JSON object, got {}'.format(type(record).__name__))
+    if 'variables' in record and isinstance(record['variables'], dict):
+        return record.get('id'), record['variables']
+    return None, record
+
+
+def _result_record(result, meta, latex):
+    record = {'index': result.index}
+    if meta['id'] is not None:
+        record['id'] = meta['id']
+    record['source'] = meta['source']
+    error = meta['error'] or result.error
+    if error is not None:
+        record['error'] = error
+        return record
+    record['variables'] = list(result.variables)
+    record['prefixed_dimensionless_terms'] = list(result.prefixed_dimensionless_terms)
+    record['exponents'] = result.exponents.tolist()
+    record['denominators'] = result.denominators.tolist()
+    if latex:
+        pi_term_sets = result.pi_term_sets()
+        record['latex'] = [[pi_term_sets.latex(set_index, term_index) for term_index in range(pi_term_sets.num_terms)]
+                           for set_index in range(pi_term_sets.num_sets)]
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='buckinghampy', description=DESCRIPTION,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='*', help="input files, '-' or nothing for stdin")
+    parser.add_argument('--format', choices=['auto', 'json', 'jsonl'], default='auto',
+                        help="format of the inputs; 'auto' reads .json files as JSON and the rest as JSON Lines")
+    parser.add_argument('-o', '--output', help='write the results to this file instead of stdout')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker processes, 0 for one per CPU (default: 1)')
+    parser.add_argument('--chunksize', type=int, default=16,
+                        help='number of problems sent to a worker at once (default: 16)')
+    parser.add_argument('--unordered', action='store_true',
+                        help='write the results as they complete instead of in the order of the inputs')
+    parser.add_argument('--exact', action='store_true', help='solve with exact integer arithmetic')
+    parser.add_argument('--latex', action='store_true', help='add the LaTeX form of every pi term to the results')
+    parser.add_argument('--strict', action='store_true', help='exit with status 1 when any problem failed')
+    args = parser.parse_args(argv)
+
+    # metadata of the problems read but not written yet, so that memory stays bounded by the problems in flight
+    pending = {}
+
+    def problems():
+        for index, (source, record) in enumerate(_records(args.inputs, args.format)):
+            meta = {'id': None, 'source': source, 'error': None}
+            try:
+                meta['id'], spec = _problem(record)
+            except Exception as e:
+                # an empty problem goes through the batch like the others, its error is reported instead
+                meta['error'] = '{}: {}'.format(type(e).__name__, e)
+                spec = {}
+            pending[index] = meta
+            yield spec
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    failed = 0
+    try:
+        for result in solve_many(problems(), max_workers=args.workers or None, chunksize=args.chunksize,
+                                 ordered=not args.unordered, exact=args.exact):
+            record = _result_record(result, pending.pop(result.index), args.latex)
+            failed += 'error' in record
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+    except BrokenPipeError:
+        # the reader of the output went away, as with `buckinghampy ... | head`. The output is pointed at devnull so
+        # that flushing it again on exit does not fail, and stderr stays open for any later error.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, output.fileno())
+        os.close(devnull)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if (args.strict and failed) else 0
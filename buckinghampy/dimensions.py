@@ -0,0 +1,148 @@
+"""dimensions.py: parsing of the dimension strings of the variables into exponents of the fundamental dimensions."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import re
+from functools import lru_cache
+
+_TOKEN = re.compile(r'[a-z_][a-z0-9_]*|\d+|[*/^()\-]')
+
+_CACHE_SIZE = 4096
+
+
+class _UnsupportedDimensions(Exception):
+    pass
+
+
+class _DimensionsParser:
+    '''
+    Recursive descent parser for the product/power grammar of dimension strings:
+
+        expr     := factor (('*' | '/') factor)*
+        factor   := atom ('^' exponent)?
+        atom     := name | '1' | '(' expr ')'
+        exponent := ['-'] integer | '(' ['-'] integer ')'
+    '''
+
+    def __init__(self, string):
+        self.tokens = _TOKEN.findall(string)
+        if ''.join(self.tokens) != string.replace(' ', ''):
+            raise _UnsupportedDimensions(string)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise _UnsupportedDimensions(expected)
+        self.pos += 1
+        return token
+
+    def parse(self):
+        exponents = self.expr()
+        if self.peek() is not None:
+            raise _UnsupportedDimensions(self.peek())
+        return exponents
+
+    def expr(self):
+        exponents = self.factor()
+        while self.peek() in ('*', '/'):
+            sign = 1 if self.take() == '*' else -1
+            for name, exponent in self.factor().items():
+                exponents[name] = exponents.get(name, 0) + sign * exponent
+        return exponents
+
+    def factor(self):
+        exponents = self.atom()
+        if self.peek() == '^':
+            self.take()
+            power = self.exponent()
+            exponents = {name: exponent * power for name, exponent in exponents.items()}
+        return exponents
+
+    def atom(self):
+        token = self.take()
+        if token == '(':
+            exponents = self.expr()
+            self.take(')')
+            return exponents
+        if token == '1':
+            return {}
+        if token[0].isalpha() or token[0] == '_':
+            return {token: 1}
+        raise _UnsupportedDimensions(token)
+
+    def exponent(self):
+        parenthesized = self.peek() == '('
+        if parenthesized:
+            self.take()
+        sign = -1 if self.peek() == '-' else 1
+        if sign == -1:
+            self.take()
+        token = self.take()
+        if not token.isdigit():
+            raise _UnsupportedDimensions(token)
+        if parenthesized:
+            self.take(')')
+        return sign * int(token)
+
+
+def _parse_with_sympy(string):
+    '''
+    Fallback for the dimension strings that the dedicated parser does not understand.
+    '''
+    # SymPy is only imported when a dimension string needs it
+    import sympy as sp
+    from sympy.parsing.sympy_parser import parse_expr
+    from sympy.core.mul import Mul, Pow
+    expr = parse_expr(string.replace('^', '**'))
+
+    if not (isinstance(expr, Mul) or isinstance(expr, Pow) or isinstance(expr, sp.Symbol)):
+        raise Exception('expression of type {} is not of the accepted types ({}, {}, {})'.format(
+            type(expr), Mul, Pow, sp.Symbol))
+    if expr.as_coeff_Mul()[0] != 1:
+        raise Exception('cannot have coefficients, {}, that multiply the expression {}'.format(
+            expr.as_coeff_Mul()[0], expr.as_coeff_Mul()[1]))
+
+    args = [expr] if isinstance(expr, (Pow, sp.Symbol)) else list(expr.args)
+    exponents = []
+    for e in args:
+        var, exponent = e.as_base_exp()
+        if not exponent.is_Integer:
+            raise Exception('the exponent of {} in {} has to be an integer, got {}'.format(var, string, exponent))
+        exponents.append((str(var), int(exponent)))
+    return tuple(exponents)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _parse_normalized_dimensions(string):
+    try:
+        exponents = _DimensionsParser(string).parse()
+    except _UnsupportedDimensions:
+        return _parse_with_sympy(string)
+    exponents = tuple((name, exponent) for name, exponent in exponents.items() if exponent != 0)
+    if not exponents:
+        # let sympy report the expression that reduces to a number
+        return _parse_with_sympy(string)
+    return exponents
+
+
+def parse_dimensions(dimensions: str):
+    '''
+    Parse a dimension string such as 'm*l^-3' or 'M/(T*L)' into the exponents of its fundamental dimensions.
+    Results are kept in a bounded LRU cache keyed by the normalized string.
+    :param dimensions: (string) product/power expression of the fundamental dimensions.
+    :return: (tuple) pairs of (fundamental dimension, integer exponent), in order of appearance.
+    '''
+    string = ' '.join(dimensions.split()).lower().replace('**', '^')
+    return _parse_normalized_dimensions(string)
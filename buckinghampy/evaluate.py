@@ -0,0 +1,203 @@
+"""evaluate.py: vectorized numeric evaluation of the pi terms of a set over arrays of data."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+CHUNK_SIZE = 65536  # number of rows evaluated together
+
+
+def _set_exponents(pi_term_sets, set_index):
+    '''
+    Exponents of one set restricted to the variables it uses, as (names, numerators, denominators) with numerators
+    and denominators of shape (pi terms, used variables). Every exponent is reduced to lowest terms, since the signs
+    of the powers of negative values depend on the parity of its reduced numerator and denominator.
+    '''
+    exponents = pi_term_sets.exponents[set_index]
+    used = np.nonzero(np.any(exponents != 0, axis=0))[0]
+    names = [pi_term_sets.variables[idx] for idx in used]
+    numerators = exponents[:, used]
+    denominators = np.broadcast_to(pi_term_sets.denominators[set_index][:, None], numerators.shape)
+    # gcd(0, d) = d, so zero exponents become 0 / 1
+    divisors = np.gcd(numerators, denominators)
+    return names, numerators // divisors, denominators // divisors
+
+
+def _real_power(x, numerator, denominator):
+    '''
+    x ** (numerator / denominator) over the reals, for an exponent in lowest terms: odd roots of negative values are
+    negative, even roots of negative values are nan.
+    '''
+    if denominator == 1:
+        return np.power(x, numerator)
+    result = np.power(np.abs(x), numerator / denominator)
+    if denominator % 2 == 1:
+        if numerator % 2 == 1:
+            np.negative(result, out=result, where=x < 0)
+    else:
+        result[x < 0] = np.nan
+    return result
+
+
+def _evaluate_power(columns, numerators, denominators, out):
+    for term, (term_numerators, term_denominators) in enumerate(zip(numerators.tolist(), denominators.tolist())):
+        acc = out[:, term]
+        acc.fill(1.0)
+        for x, numerator, denominator in zip(columns, term_numerators, term_denominators):
+            if numerator != 0:
+                acc *= _real_power(x, numerator, denominator)
+
+
+def _evaluate_log(columns, numerators, denominators, out):
+    X = np.stack(columns, axis=1)
+    with np.errstate(divide='ignore'):
+        logs = np.log(np.abs(X))
+    # a finite stand-in for log(0), so that a zero exponent of a zero value contributes 0 rather than nan
+    logs[np.isneginf(logs)] = np.finfo(float).min
+    with np.errstate(over='ignore', invalid='ignore'):
+        np.exp(logs @ (numerators / denominators).T, out=out)
+
+    negative = X < 0
+    if negative.any():
+        flips = ((numerators % 2 == 1) & (denominators % 2 == 1)).astype(float)
+        complex_roots = ((numerators != 0) & (denominators % 2 == 0)).astype(float)
+        out[(negative @ flips.T) % 2 == 1] *= -1
+        out[(negative @ complex_roots.T) > 0] = np.nan
+
+
+def _evaluator(method):
+    if method == 'power':
+        return _evaluate_power
+    if method == 'log':
+        return _evaluate_log
+    raise Exception("the evaluation method has to be either 'power' or 'log'.")
+
+
+def _evaluate_chunk(evaluate, chunk, numerators, denominators, out):
+    '''
+    Evaluate one chunk of rows, given as the list of the columns of the variables of the set followed by those of the
+    prefixed dimensionless terms, into `out` of shape (rows, num_terms).
+    '''
+    num_vars = numerators.shape[1]
+    num_solved = numerators.shape[0]
+    if num_solved:
+        evaluate(chunk[:num_vars], numerators, denominators, out[:, :num_solved])
+    for term, column in enumerate(chunk[num_vars:]):
+        out[:, num_solved + term] = column
+
+
+def _columns(pi_term_sets, set_index, load):
+    '''
+    Columns of the variables of a set followed by those of its prefixed dimensionless terms, each given by
+    load(name), with the numerators and denominators of the exponents of the set.
+    '''
+    names, numerators, denominators = _set_exponents(pi_term_sets, set_index)
+    columns = [load(name) for name in names + list(pi_term_sets.prefixed_dimensionless_terms)]
+    num_rows = len(columns[0])
+    if any(column.shape != (num_rows,) for column in columns):
+        raise Exception('all the variables have to be one dimensional arrays of the same length.')
+    return columns, numerators, denominators
+
+
+def evaluate_pi_terms(pi_term_sets, data, set_index=0, chunk_size=CHUNK_SIZE, out=None, method='power'):
+    '''
+    Evaluate every pi term of a set over arrays of data, straight from the exponents, without building any SymPy
+    expression. The rows are processed in chunks of `chunk_size`, so the temporaries stay bounded whatever the size
+    of the data, and no Python code runs per row.
+    :param pi_term_sets: (PiTermSets or BuckinghamPi) the result of generate_pi_terms.
+    :param data: (mapping or structured array) values of the variables, indexed by variable name. Every variable of
+                 the set and every prefixed dimensionless term must be present, all with the same number of rows.
+    :param set_index: (int) index of the set to evaluate.
+    :param chunk_size: (int) number of rows evaluated together.
+    :param out: (array) optional float64 buffer of shape (rows, num_terms) to write the result into.
+    :param method: (string) 'power' multiplies the powers of the variables of every term; 'log' computes all the
+                   terms at once as exp(log|x| @ exponents) and restores their signs, which is faster when sets have
+                   many terms, at the cost of a few ulps of accuracy.
+    :return: (array) of shape (rows, num_terms), one column per pi term in the order of the set, the prefixed
+             dimensionless terms last.
+    '''
+    pi_term_sets = getattr(pi_term_sets, 'pi_term_sets', pi_term_sets)
+    evaluate = _evaluator(method)
+    columns, numerators, denominators = _columns(pi_term_sets, set_index, lambda name: np.asarray(data[name]))
+
+    num_rows = len(columns[0])
+    shape = (num_rows, pi_term_sets.num_terms)
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape:
+        raise Exception('out has to be of shape {}.'.format(shape))
+
+    for start in range(0, num_rows, chunk_size):
+        stop = min(start + chunk_size, num_rows)
+        chunk = [np.asarray(column[start:stop], dtype=float) for column in columns]
+        _evaluate_chunk(evaluate, chunk, numerators, denominators, out[start:stop])
+    return out
+
+
+def _open_column(source, raw_dtype):
+    if isinstance(source, (str, os.PathLike)):
+        if os.fspath(source).endswith('.npy'):
+            return np.load(source, mmap_mode='r')
+        return np.memmap(source, dtype=raw_dtype, mode='r')
+    return source
+
+
+def evaluate_pi_terms_to_files(pi_term_sets, inputs, output, set_index=0, chunk_size=CHUNK_SIZE, method='power',
+                               raw_dtype='float64', dtype='float64'):
+    '''
+    Out-of-core counterpart of evaluate_pi_terms, for data larger than memory. The input columns are memory-mapped
+    and the pi terms are written to memory-mapped .npy files one chunk of rows at a time, so the memory used stays
+    bounded by `chunk_size` whatever the number of rows.
+    :param pi_term_sets: (PiTermSets or BuckinghamPi) the result of generate_pi_terms.
+    :param inputs: (mapping) variable name to the path of its column, either a .npy file or a raw binary file of
+                   `raw_dtype`, or to an array or memmap. Every variable of the set and every prefixed dimensionless
+                   term must be present, all with the same number of rows.
+    :param output: (string or list) path of a .npy file that receives all the pi terms as an array of shape
+                   (rows, num_terms), or a list of num_terms paths of .npy files that receive one pi term each.
+    :param set_index: (int) index of the set to evaluate.
+    :param chunk_size: (int) number of rows evaluated and written together.
+    :param method: (string) 'power' or 'log', see evaluate_pi_terms.
+    :param raw_dtype: (string) data type of the input columns given as raw binary files.
+    :param dtype: (string) data type of the output files.
+    :return: (memmap or list) the output file(s), opened read-write.
+    '''
+    pi_term_sets = getattr(pi_term_sets, 'pi_term_sets', pi_term_sets)
+    evaluate = _evaluator(method)
+    columns, numerators, denominators = _columns(pi_term_sets, set_index,
+                                                 lambda name: _open_column(inputs[name], raw_dtype))
+
+    num_rows = len(columns[0])
+    num_terms = pi_term_sets.num_terms
+    if isinstance(output, (str, os.PathLike)):
+        outputs = [open_memmap(output, mode='w+', dtype=dtype, shape=(num_rows, num_terms))]
+    else:
+        if len(output) != num_terms:
+            raise Exception('output has to list {} paths, one per pi term.'.format(num_terms))
+        outputs = [open_memmap(path, mode='w+', dtype=dtype, shape=(num_rows,)) for path in output]
+
+    buffer = np.empty((min(chunk_size, num_rows), num_terms))
+    for start in range(0, num_rows, chunk_size):
+        stop = min(start + chunk_size, num_rows)
+        chunk = [np.asarray(column[start:stop], dtype=float) for column in columns]
+        result = buffer[:stop - start]
+        _evaluate_chunk(evaluate, chunk, numerators, denominators, result)
+        if len(outputs) == 1 and outputs[0].ndim == 2:
+            outputs[0][start:stop] = result
+        else:
+            for term, out in enumerate(outputs):
+                out[start:stop] = result[:, term]
+        # write the chunk back, so that the dirty pages of the outputs do not pile up
+        for out in outputs:
+            out.flush()
+    return outputs[0] if isinstance(output, (str, os.PathLike)) else outputs
@@ -0,0 +1,111 @@
+"""instrumentation.py: opt-in timings and counters of the stages of the pi-theorem pipeline."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import threading
+import time
+
+
+class _StageTimer:
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+
+
+class Stats:
+    enabled = True
+
+    def __init__(self, callback=None):
+        '''
+        Collect the wall time of every stage and the counters of a run.
+        :param callback: (callable) called as callback(kind, name, value) for every recorded stage timing
+                         (kind 'stage', value in seconds) and counter increment (kind 'counter').
+        '''
+        self.callback = callback
+        self.timings = {}
+        self.counters = {}
+        self.__lock = threading.Lock()
+
+    def reset(self):
+        with self.__lock:
+            self.timings = {}
+            self.counters = {}
+
+    def stage(self, name):
+        '''
+        Context manager that adds the wall time of its block to the timing of stage `name`.
+        '''
+        return _StageTimer(self, name)
+
+    def record(self, name, seconds):
+        with self.__lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        if self.callback is not None:
+            self.callback('stage', name, seconds)
+
+    def count(self, name, value=1):
+        if not value:
+            return
+        with self.__lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.callback is not None:
+            self.callback('counter', name, value)
+
+    def as_dict(self):
+        with self.__lock:
+            return {'timings': dict(self.timings), 'counters': dict(self.counters)}
+
+
+class _NullStageTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class NullStats:
+    '''
+    Stand-in for Stats when instrumentation is disabled: every method is a no-op.
+    '''
+    __slots__ = ()
+
+    enabled = False
+
+    _TIMER = _NullStageTimer()
+
+    def reset(self):
+        pass
+
+    def stage(self, name):
+        return self._TIMER
+
+    def record(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def as_dict(self):
+        return {'timings': {}, 'counters': {}}
+
+
+NULL_STATS = NullStats()
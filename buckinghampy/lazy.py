@@ -0,0 +1,35 @@
+"""lazy.py: deferred imports of the heavy optional dependencies, so that the numeric core loads with NumPy only."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import importlib
+
+
+class LazyModule:
+    '''
+    Stand-in for a module that is only imported when one of its attributes is first accessed, e.g.
+    sp = LazyModule('sympy') then sp.symbols('x').
+    '''
+    __slots__ = ('__name', '__module')
+
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+
+    def __getattr__(self, attr):
+        module = self.__module
+        if module is None:
+            module = self.__module = importlib.import_module(self.__name)
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__module is not None else 'not loaded'
+        return '<lazy module {!r} ({})>'.format(self.__name, state)
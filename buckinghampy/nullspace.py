@@ -0,0 +1,641 @@
+"""nullspace.py: the numeric core of the pi-theorem, solving the null spaces of the dimension matrix."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import numpy as np
+from fractions import Fraction
+from math import gcd
+from itertools import islice
+import heapq
+import threading
+
+from .instrumentation import NULL_STATS
+
+BATCH_SIZE = 256  # number of repeating sets solved together in one batched call
+
+SINGULAR_MESSAGE = \
+    "All the P matrices in the possible sets of dimensionless groups were singular, resulting in no pi terms."
+
+def _normalize_integer_vector(vec):
+    """Divide an integer vector by the gcd of its entries and flip its sign so that the last entry is positive."""
+    g = 0
+    for v in vec:
+        g = gcd(g, v)
+    if vec[-1] < 0:
+        g = -g
+    return [v // g for v in vec]
+
+
+def _rationalize_vector(vec, max_denominator=1000):
+    """Convert a float numpy vector to a gcd-reduced integer vector using stdlib fractions."""
+    fracs = [Fraction(float(v)).limit_denominator(max_denominator) for v in vec]
+    denominator = 1
+    for frac in fracs:
+        denominator = denominator * frac.denominator // gcd(denominator, frac.denominator)
+    return _normalize_integer_vector([int(frac * denominator) for frac in fracs])
+
+
+def _bareiss_solve(A, B):
+    """
+    Fraction-free (Bareiss) Gauss-Jordan elimination of the integer system A X = B, with A of shape m x m and B of
+    shape m x r given as lists of rows. Every intermediate division is exact, so no rational arithmetic is needed.
+    Returns (d, Y) where d = +/-det(A) and Y = d X is an integer m x r matrix, or None when A is singular.
+    """
+    m = len(A)
+    rows = [list(a) + list(b) for a, b in zip(A, B)]
+    prev = 1
+    for k in range(m):
+        pivot = next((i for i in range(k, m) if rows[i][k] != 0), None)
+        if pivot is None:
+            return None
+        rows[k], rows[pivot] = rows[pivot], rows[k]
+        row_k = rows[k]
+        a_kk = row_k[k]
+        for i in range(m):
+            if i != k:
+                a_ik = rows[i][k]
+                rows[i] = [(a_kk * a_ij - a_ik * a_kj) // prev for a_ij, a_kj in zip(rows[i], row_k)]
+        prev = a_kk
+    # after the last step every diagonal entry equals the final pivot
+    return prev, [row[m:] for row in rows]
+
+
+def _independent_residual(basis, col, tol=1e-10):
+    """
+    Component of `col` orthogonal to the orthonormal rows of `basis`, normalized, or None when `col` lies in their
+    span.
+    """
+    residual = col.astype(float)
+    # orthogonalize twice against the basis to keep the rank test stable
+    for _ in range(2):
+        if basis.shape[0]:
+            residual -= basis.T @ (basis @ residual)
+    norm = np.linalg.norm(residual)
+    if norm <= tol * max(1.0, np.linalg.norm(col)):
+        return None
+    return residual / norm
+
+
+def independent_combinations(M, indices, m, stats=NULL_STATS):
+    """
+    Lazily yield the m-combinations of `indices`, in lexicographic order, whose columns in M are linearly
+    independent. An orthonormal basis of the current prefix is grown one column at a time, so a prefix that is
+    already rank-deficient is pruned together with every combination that extends it.
+    """
+    n = len(indices)
+    comb = []
+
+    def extend(start, basis):
+        depth = len(comb)
+        if depth == m:
+            yield tuple(comb)
+            return
+        for pos in range(start, n - (m - depth) + 1):
+            residual = _independent_residual(basis, M[:, indices[pos]])
+            if residual is None:
+                stats.count('rank_deficient_prefixes_pruned')
+                continue
+            comb.append(indices[pos])
+            yield from extend(pos + 1, np.vstack([basis, residual]))
+            comb.pop()
+
+    yield from extend(0, np.zeros((0, M.shape[0])))
+
+
+def ranked_independent_combinations(M, indices, m, costs, stats=NULL_STATS):
+    """
+    Lazily yield the m-combinations of `indices` whose columns in M are linearly independent, by increasing total
+    cost, the cost of a combination being the sum of the `costs` of its variables. Ties are broken lexicographically
+    on the variables sorted by cost.
+
+    This is a best-first search over partial combinations of the variables sorted by cost. A partial combination is
+    bounded below by its cost plus the cost of the cheapest variables that can complete it, and only has two
+    successors: itself extended with the next variable, and itself with its last variable replaced by the next one.
+    Neither successor is ever cheaper than its parent, so combinations come out of the heap in order of cost, and
+    only the combinations cheaper than the last one yielded are ever explored. Rank-deficient partial combinations
+    are pruned together with every combination that extends them, as in independent_combinations.
+    """
+    order = sorted(indices, key=lambda idx: (costs[idx], idx))
+    c = [float(costs[idx]) for idx in order]
+    n = len(order)
+    cumulative = np.concatenate([[0.0], np.cumsum(c)])
+
+    def push(heap, prefix_cost, positions, parent_basis):
+        # positions[-1] is added to the partial combination positions[:-1], whose orthonormal basis is parent_basis
+        last = positions[-1]
+        remaining = m - len(positions)
+        if last + remaining >= n:
+            return
+        cost = prefix_cost + c[last]
+        bound = cost + cumulative[last + 1 + remaining] - cumulative[last + 1]
+        residual = _independent_residual(parent_basis, M[:, order[last]])
+        if residual is None:
+            stats.count('rank_deficient_prefixes_pruned')
+            basis = None
+        else:
+            basis = np.vstack([parent_basis, residual])
+        heapq.heappush(heap, (bound, positions, prefix_cost, cost, parent_basis, basis))
+
+    heap = []
+    push(heap, 0.0, (0,), np.zeros((0, M.shape[0])))
+    while heap:
+        _, positions, prefix_cost, cost, parent_basis, basis = heapq.heappop(heap)
+        # the sibling replaces the last variable with the next one
+        push(heap, prefix_cost, positions[:-1] + (positions[-1] + 1,), parent_basis)
+        if basis is None:
+            continue
+        if len(positions) == m:
+            yield tuple(sorted(order[pos] for pos in positions))
+        else:
+            push(heap, cost, positions + (positions[-1] + 1,), basis)
+
+
+def _sparse_term_key(term):
+    """Key of a pi term with exponents beyond 64 bits, see _term_keys."""
+    vect = sorted((var_idx, exponent) for var_idx, exponent in zip(term['order'], term['power']) if exponent != 0)
+    if vect[0][1] < 0:
+        vect = [(var_idx, -exponent) for var_idx, exponent in vect]
+    return tuple(vect), term['power'][-1]
+
+
+def _term_keys(terms):
+    """
+    Canonical numeric keys of a list of pi terms. The real exponents of a term are its gcd-reduced integer exponent
+    vector divided by the exponent of its last variable, so the key holds that vector as (index, exponent) pairs
+    sorted by variable index, together with the divisor. The sign of the vector is chosen so that the first nonzero
+    exponent is positive: a term and its inverse share the same key, while a term and any other power of it do not.
+
+    The keys of all the terms are computed at once, each as the bytes of one row of (indices, exponents, divisor),
+    with the zero exponents cleared to (-1, 0) pairs that sort first.
+    """
+    if not terms:
+        return []
+    try:
+        powers = np.array([term['power'] for term in terms], dtype=np.int64)
+    except OverflowError:
+        # exact exponents beyond 64 bits are keyed as tuples, every other term keeps its usual key
+        return [_term_keys([term])[0] if all(abs(exponent) < 2 ** 63 for exponent in term['power'])
+                else _sparse_term_key(term) for term in terms]
+    orders = np.array([term['order'] for term in terms], dtype=np.int64)
+    orders[powers == 0] = -1
+    perm = np.argsort(orders, axis=1)
+    orders = np.take_along_axis(orders, perm, axis=1)
+    vectors = np.take_along_axis(powers, perm, axis=1)
+    vectors *= np.sign(vectors[np.arange(len(terms)), np.argmax(vectors != 0, axis=1)])[:, None]
+    rows = np.concatenate([orders, vectors, powers[:, -1:]], axis=1)
+    return rows.view(np.dtype((np.void, rows.shape[1] * rows.itemsize))).ravel().tolist()
+
+
+def _set_term_keys(spaces):
+    """Store the canonical key of every pi term of the lists of terms `spaces` as its 'key'."""
+    terms = [term for space in spaces for term in space]
+    for term, key in zip(terms, _term_keys(terms)):
+        term['key'] = key
+
+
+class NullSpace(list):
+    """
+    The pi terms of one repeating set, as a list of {'order', 'power', 'key'} dicts, with the canonical key of the
+    set: the frozenset of the keys of its terms, invariant to the order of the terms and to their inversion. The
+    variable indices and exponents of a term are tuples, so that the garbage collector stops tracking the terms
+    held by a SolveCache.
+    """
+    __slots__ = ('key',)
+
+    def __init__(self, terms):
+        super().__init__(terms)
+        self.key = frozenset(term['key'] for term in self)
+
+
+def _null_spaces(spaces):
+    """NullSpaces of lists of {'order', 'power'} terms, whose keys are all computed at once."""
+    _set_term_keys(spaces)
+    return [NullSpace(space) for space in spaces]
+
+
+def _extra_variables(combs, n):
+    """For every repeating set of the (k, m) array `combs`, the ascending indices of the remaining n - m variables."""
+    k, m = combs.shape
+    is_extra = np.ones((k, n), dtype=bool)
+    is_extra[np.arange(k)[:, None], combs] = False
+    return np.nonzero(is_extra)[1].reshape(k, n - m)
+
+
+def _float_terms(M, combs, factorizations, extras):
+    """
+    Pi terms of the columns `extras`, of shape (k, r), for k repeating sets given as tuples of indices with the
+    (determinant, inverse) factorizations of their submatrices, all solved with one batched product. Every null
+    space vector is normalized so that its extra variable has a unit exponent.
+
+    M is an integer matrix, so the determinant times a solution is an integer vector, which gives the exponents in
+    lowest terms without rationalizing them one by one. That vector is what _rationalize_vector finds whenever every
+    exponent has a denominator of at most 1000 in lowest terms; the other vectors still go through it.
+    """
+    dets = np.array([det for det, _ in factorizations])
+    B = M[:, extras].transpose(1, 0, 2)  # shape: (k, m, r)
+    X = np.matmul(np.stack([inverse for _, inverse in factorizations]), -B)  # shape: (k, m, r)
+    scaled = X * dets[:, None, None]
+    Y = np.rint(scaled)
+    integral = (np.abs(scaled - Y) <= 1e-6).all(axis=1) & (np.abs(dets) < 2 ** 31)[:, None]  # shape: (k, r)
+
+    Y = np.where(integral[:, None, :], Y, 0).astype(np.int64)
+    D = np.broadcast_to(dets.astype(np.int64)[:, None, None], (len(dets), 1, Y.shape[2]))
+    integral &= (np.abs(D) // np.gcd(Y, D) <= 1000).all(axis=1)
+    vectors = np.concatenate([Y, D], axis=1)  # shape: (k, m + 1, r)
+    divisors = np.gcd.reduce(vectors, axis=1) * np.sign(D[:, 0, :])
+    vectors //= np.where(divisors == 0, 1, divisors)[:, None, :]
+
+    return [[{'order': comb + (extra_var,),
+              'power': tuple(power if is_integral else _rationalize_vector(np.append(exponents[:, j], 1.0)))}
+             for j, (extra_var, power, is_integral) in enumerate(zip(extra_vars, powers, integrals))]
+            for comb, extra_vars, powers, integrals, exponents in
+            zip(combs, extras.tolist(), vectors.transpose(0, 2, 1).tolist(), integral.tolist(), X)]
+
+
+def _solve_float(M, combs):
+    """
+    Factorize and solve a batch of repeating sets at once. The m x m repeating submatrices are stacked into a
+    (k, m, m) array, checked for singularity with one batched slogdet and inverted with one batched call. Returns
+    ((determinant, inverse), null space) for every repeating set, (None, None) for the singular ones.
+    """
+    combs = np.asarray(combs, dtype=int)  # shape: (k, m)
+    P = M[:, combs].transpose(1, 0, 2)  # shape: (k, m, m)
+    sign, logdet = np.linalg.slogdet(P)
+    non_singular = (sign != 0) & (logdet > np.log(1e-10))
+    results = [(None, None)] * len(combs)
+    if non_singular.any():
+        solved = np.nonzero(non_singular)[0]
+        factorizations = list(zip(np.rint(sign * np.exp(logdet))[solved].tolist(), np.linalg.inv(P[solved])))
+        extras = _extra_variables(combs[solved], M.shape[1])
+        spaces = _null_spaces(_float_terms(M, list(map(tuple, combs[solved].tolist())), factorizations, extras))
+        for i, factorization, space in zip(solved.tolist(), factorizations, spaces):
+            results[i] = (factorization, space)
+    return results
+
+
+def _exact_terms(M_int, comb, factorization, extra_vars):
+    """Pi terms of the columns `extra_vars` of M_int for one repeating set, given its determinant and adjugate."""
+    det, adjugate = factorization
+    terms = []
+    for extra_var in extra_vars:
+        b = [row[extra_var] for row in M_int]
+        power = _normalize_integer_vector([-sum(a * b_i for a, b_i in zip(row, b)) for row in adjugate] + [det])
+        terms.append({'order': comb + (extra_var,), 'power': tuple(power)})
+    return terms
+
+
+def _solve_exact(M_int, combs):
+    """
+    Exact counterpart of _solve_float on the integer dimension matrix M_int, given as a list of rows: each repeating
+    set is factorized once with Bareiss' fraction-free algorithm into its determinant and adjugate, and the exponents
+    of all of its extra columns come out of integer products directly.
+    """
+    n = len(M_int[0])
+    factorizations = []
+    terms = []
+    for comb in combs:
+        comb = tuple(comb)
+        P = [[row[i] for i in comb] for row in M_int]
+        identity = [[int(i == j) for j in range(len(comb))] for i in range(len(comb))]
+        factorization = _bareiss_solve(P, identity)
+        factorizations.append(factorization)
+        if factorization is not None:
+            extra_vars = [idx for idx in range(n) if idx not in comb]
+            terms.append(_exact_terms(M_int, comb, factorization, extra_vars))
+    spaces = iter(_null_spaces(terms))
+    return [(None, None) if factorization is None else (factorization, next(spaces))
+            for factorization in factorizations]
+
+
+def _count_solved(results, stats):
+    stats.count('factorizations', len(results))
+    stats.count('singular_skipped', sum(1 for _, space in results if space is None))
+
+
+def solve_repeating_sets(M, combs, stats=NULL_STATS):
+    """
+    Solve a batch of repeating sets at once: one batched slogdet, one batched inverse and one batched product for all
+    of their extra columns. Returns the null spaces of the non-singular repeating sets.
+    """
+    results = _solve_float(M, combs)
+    _count_solved(results, stats)
+    return [space for _, space in results if space is not None]
+
+
+def solve_repeating_sets_exactly(M_int, combs, stats=NULL_STATS):
+    """
+    Exact counterpart of solve_repeating_sets on the integer dimension matrix M_int, given as a list of rows.
+    """
+    results = _solve_exact(M_int, combs)
+    _count_solved(results, stats)
+    return [space for _, space in results if space is not None]
+
+
+def _combinations_with(columns, m, changed, bound=None):
+    """
+    Lazily yield the m-combinations of `columns` that include at least one of the `changed` columns, in lexicographic
+    order, up to `bound` included when it is given.
+    """
+    n = len(columns)
+    last_changed = max([pos for pos, idx in enumerate(columns) if idx in changed], default=-1)
+    comb = []
+
+    def extend(start, found):
+        depth = len(comb)
+        if depth == m:
+            if found:
+                yield tuple(comb)
+            return
+        for pos in range(start, n - (m - depth) + 1):
+            if not found and pos > last_changed:
+                return
+            comb.append(columns[pos])
+            if bound is not None and tuple(comb) > bound[:depth + 1]:
+                comb.pop()
+                return
+            yield from extend(pos + 1, found or columns[pos] in changed)
+            comb.pop()
+
+    yield from extend(0, False)
+
+
+def _update_combinations(M, combs, columns, changed, bound=None, stats=NULL_STATS):
+    """
+    The independent combinations of `columns` in M, in lexicographic order and up to `bound` included when it is
+    given, from the same ones before the `changed` columns changed: the ones without a changed column are kept, and
+    only the combinations with a changed column are tested, with batched determinants.
+    """
+    combs = [comb for comb in combs if changed.isdisjoint(comb)]
+    candidates = _combinations_with(columns, M.shape[0], changed, bound)
+    for batch in iter(lambda: list(islice(candidates, BATCH_SIZE)), []):
+        # the determinant of a non-singular integer matrix is at least 1 in magnitude
+        independent = np.abs(np.linalg.det(M[:, batch].transpose(1, 0, 2).astype(float))) > 0.5
+        stats.count('singular_skipped', int(np.count_nonzero(~independent)))
+        combs.extend(comb for comb, is_independent in zip(batch, independent) if is_independent)
+    return sorted(combs)
+
+
+class SolveCache:
+    """
+    Factorizations and null spaces of the repeating sets of the last solve, reused by the next one. The dimension
+    matrix of the last solve is kept, so that the columns that changed since then are found by comparing it with the
+    new one. A repeating set keeps its factorization unless one of its own columns changed, and only the terms of
+    the changed columns are solved again from it; a repeating set is shared by all the flagged variables it excludes,
+    so it is solved once per solve.
+
+    The repeating sets of every flagged variable are kept too, and only the combinations that involve a changed
+    column are tested again: the lexicographic ones up to the last repeating set when their number is limited, or
+    all of them otherwise, in which case the independent combinations are found once for all the flagged variables.
+
+    Only what the last solve used is kept, so the cache never outgrows its result. A different number of fundamental
+    dimensions or a switch between float and exact solving starts from scratch.
+    """
+
+    def __init__(self):
+        self.__M = None
+        self.__exact = None
+        self.__changed = frozenset()  # columns that changed since the last solve
+        self.__results = {}  # repeating set -> (factorization, null space), None for the singular ones
+        self.__repeating_sets = {}  # flagged variable -> ((max_sets, costs), repeating sets)
+        self.__excluded = None  # column left out of every repeating set
+        self.__independent = None  # all the independent combinations of the other columns, in lexicographic order
+        self.__previous_results = {}
+        self.__previous_repeating_sets = {}
+        self.__previous_independent = None
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__results)
+
+    def begin(self, M, exact, excluded=None):
+        """
+        Start a solve of the dimension matrix M: find the columns that changed since the last solve, and drop the
+        results of the repeating sets that include any of them. `excluded` is the column of the flagged variable when
+        only it is solved, which no repeating set includes.
+        """
+        M = np.array(M, dtype=np.int64)
+        last = self.__M
+        if last is None or exact != self.__exact or last.shape[0] != M.shape[0] or last.shape[1] > M.shape[1]:
+            self.__changed = frozenset()
+            self.__previous_results = {}
+            self.__previous_repeating_sets = {}
+            self.__previous_independent = None
+        else:
+            num_last = last.shape[1]
+            edited = np.nonzero(np.any(last != M[:, :num_last], axis=0))[0].tolist()
+            self.__changed = frozenset(edited + list(range(num_last, M.shape[1])))
+            self.__previous_results = {comb: result for comb, result in self.__results.items()
+                                       if self.__changed.isdisjoint(comb)}
+            self.__previous_repeating_sets = self.__repeating_sets
+            self.__previous_independent = self.__independent if excluded == self.__excluded else None
+        self.__M = M
+        self.__exact = exact
+        self.__excluded = excluded
+        self.__results = {}
+        self.__repeating_sets = {}
+        self.__independent = None
+
+    def end(self):
+        """Drop what the solve started by begin did not use."""
+        self.__previous_results = {}
+        self.__previous_repeating_sets = {}
+        self.__previous_independent = None
+
+    def remove_column(self, col):
+        """
+        Follow the removal of the column `col` of the dimension matrix, after which the next columns shift left: the
+        results that involve it are dropped and the other ones are renumbered.
+        """
+        if self.__M is None or col >= self.__M.shape[1]:
+            return
+        self.__M = np.delete(self.__M, col, axis=1)
+
+        def renumber(indices):
+            return tuple(idx - (idx > col) for idx in indices)
+
+        results = {}
+        for comb, (factorization, space) in self.__results.items():
+            if col in comb:
+                continue
+            if space is not None:
+                space = [{'order': renumber(term['order']), 'power': term['power']}
+                         for term in space if term['order'][-1] != col]
+            results[renumber(comb)] = (factorization, space)
+        renumbered = [space for _, space in results.values() if space is not None]
+        spaces = iter(_null_spaces(renumbered))
+        self.__results = {comb: (factorization, space if space is None else next(spaces))
+                          for comb, (factorization, space) in results.items()}
+        # without the combinations that include the column, a limited number of repeating sets are not the first ones
+        self.__repeating_sets = {}
+        if self.__excluded == col:
+            self.__excluded = None
+            self.__independent = None
+        elif self.__independent is not None:
+            self.__excluded = None if self.__excluded is None else self.__excluded - (self.__excluded > col)
+            self.__independent = [renumber(comb) for comb in self.__independent if col not in comb]
+
+    def repeating_sets(self, M, var_index, max_sets=20, costs=None, stats=NULL_STATS):
+        """
+        The non-singular repeating sets of the flagged variable `var_index`, in the order of
+        iter_null_spaces_for_flagged_variable.
+        """
+        if costs is None and max_sets < 0:
+            return [comb for comb in self.__independent_combinations(M, stats) if var_index not in comb]
+        m, n = M.shape
+        all_idx = [idx for idx in range(n) if idx != var_index]
+        params = (max_sets, None if costs is None else tuple(costs))
+        previous = self.__previous_repeating_sets.get(var_index)
+        combs = None
+        if previous is not None and previous[0] == params:
+            combs = previous[1]
+            if not self.__changed.isdisjoint(all_idx):
+                # the order of the ranked ones depends on the other ones, they are all searched again
+                combs = None if costs is not None else self.__update_first_combinations(M, all_idx, combs, max_sets,
+                                                                                       stats)
+        if combs is None:
+            if costs is None:
+                all_combs = independent_combinations(M, all_idx, m, stats)
+            else:
+                all_combs = ranked_independent_combinations(M, all_idx, m, costs, stats)
+            combs = list(all_combs if max_sets < 0 else islice(all_combs, max_sets))
+        self.__repeating_sets[var_index] = (params, combs)
+        return combs
+
+    def __update_first_combinations(self, M, all_idx, combs, max_sets, stats):
+        """
+        The first max_sets independent combinations of `all_idx` in lexicographic order, given those of the last
+        solve. These hold every independent combination up to the last of them, or all of them when there were
+        fewer, so only the combinations with a changed column up to that one are tested. None when fewer than
+        max_sets remain, since the ones after it are unknown.
+        """
+        truncated = 0 < max_sets == len(combs)
+        combs = _update_combinations(M, combs, all_idx, self.__changed.intersection(all_idx),
+                                     combs[-1] if truncated else None, stats)
+        if truncated and len(combs) < max_sets:
+            return None
+        return combs[:max_sets]
+
+    def __columns(self, M):
+        return [idx for idx in range(M.shape[1]) if idx != self.__excluded]
+
+    def __independent_combinations(self, M, stats):
+        # found by the first flagged variable that needs them, and shared by the others
+        with self.__lock:
+            if self.__independent is None:
+                columns = self.__columns(M)
+                if self.__previous_independent is None:
+                    self.__independent = list(independent_combinations(M, columns, M.shape[0], stats))
+                else:
+                    self.__independent = _update_combinations(M, self.__previous_independent, columns,
+                                                              self.__changed.intersection(columns), stats=stats)
+            return self.__independent
+
+    def solve(self, M, combs, exact=False, stats=NULL_STATS):
+        """
+        Null spaces of the non-singular repeating sets among `combs`, reusing the results of the last solve and of
+        the other flagged variables. Only the repeating sets that are new or include a changed column are
+        factorized.
+        """
+        results = self.__results
+        stale = []
+        missing = []
+        for comb in combs:
+            if comb in results:
+                continue
+            result = self.__previous_results.get(comb)
+            if result is None:
+                missing.append(comb)
+            elif self.__changed and result[1] is not None:
+                stale.append((comb, result))
+            else:
+                results[comb] = result
+        stats.count('solve_cache_hits', len(combs) - len(missing))
+
+        if stale:
+            self.__resolve_changed_columns(M, stale, exact)
+        if missing:
+            solved = _solve_exact(M.astype(int).tolist(), missing) if exact else _solve_float(M, missing)
+            _count_solved(solved, stats)
+            results.update(zip(missing, solved))
+        spaces = (results[comb][1] for comb in combs)
+        return [space for space in spaces if space is not None]
+
+    def __resolve_changed_columns(self, M, stale, exact):
+        """Solve the terms of the changed columns again for repeating sets that include none of them."""
+        changed = sorted(self.__changed)
+        combs = [comb for comb, _ in stale]
+        factorizations = [factorization for _, (factorization, _) in stale]
+        if exact:
+            M_int = M.astype(int).tolist()
+            fresh = [_exact_terms(M_int, comb, factorization, changed)
+                     for comb, factorization in zip(combs, factorizations)]
+        else:
+            fresh = _float_terms(M, combs, factorizations, np.tile(changed, (len(stale), 1)))
+        _set_term_keys(fresh)
+        for (comb, (factorization, space)), terms in zip(stale, fresh):
+            space = list(space)
+            for extra_var, term in zip(changed, terms):
+                # the terms are in the order of their extra variables, the columns added since the last solve last
+                pos = extra_var - sum(idx < extra_var for idx in comb)
+                if pos < len(space):
+                    space[pos] = term
+                else:
+                    space.append(term)
+            self.__results[comb] = (factorization, NullSpace(space))
+
+
+def iter_null_spaces_for_flagged_variable(M, var_index, max_sets=20, exact=False, cache=None, stats=NULL_STATS,
+                                          costs=None):
+    """
+    Lazily yield the null spaces of the repeating sets that exclude the flagged (non-repeating) variable
+    `var_index`, one batch of repeating sets at a time. Only non-singular repeating sets are generated, so
+    `max_sets` counts usable sets; a negative value means no limit. The repeating sets are taken in lexicographic
+    order, or by increasing total cost when the per-variable `costs` are given. With a SolveCache, between its begin
+    and end, the repeating sets are all found first and solved through it.
+    """
+    if cache is not None:
+        combs = cache.repeating_sets(M, var_index, max_sets, costs, stats)
+        for start in range(0, len(combs), BATCH_SIZE):
+            batch = combs[start:start + BATCH_SIZE]
+            stats.count('combinations_examined', len(batch))
+            yield from cache.solve(M, batch, exact, stats)
+        return
+
+    m, n = M.shape
+    all_idx = [idx for idx in range(n) if idx != var_index]
+
+    if costs is None:
+        all_combs = independent_combinations(M, all_idx, m, stats)
+    else:
+        all_combs = ranked_independent_combinations(M, all_idx, m, costs, stats)
+    if max_sets >= 0:
+        all_combs = islice(all_combs, max_sets)
+
+    M_int = M.astype(int).tolist()
+    for batch in iter(lambda: list(islice(all_combs, BATCH_SIZE)), []):
+        stats.count('combinations_examined', len(batch))
+        if exact:
+            yield from solve_repeating_sets_exactly(M_int, batch, stats)
+        else:
+            yield from solve_repeating_sets(M, batch, stats)
+
+
+def solve_null_spaces_for_flagged_variable(M, var_index, max_sets=20, exact=False, cache=None, stats=NULL_STATS,
+                                           costs=None):
+    """
+    Solve the null spaces of all the repeating sets that exclude the flagged (non-repeating) variable `var_index`.
+    This function has no side effects other than on `cache`, so calls for different flagged variables are
+    independent of each other.
+    """
+    null_spaces = list(iter_null_spaces_for_flagged_variable(M, var_index, max_sets, exact, cache, stats, costs))
+    if not null_spaces:
+        raise Exception(SINGULAR_MESSAGE)
+    return null_spaces
@@ -0,0 +1,117 @@
+"""piterms.py: a compact, numeric-first container for the sets of pi terms generated by the pi-theorem."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import numpy as np
+
+from .lazy import LazyModule
+
+sp = LazyModule('sympy')
+
+
+class PiTermSets:
+    def __init__(self, variables, exponents, denominators, prefixed_dimensionless_terms=()):
+        '''
+        Construct the sets of pi terms from their exponents. SymPy expressions and LaTeX strings are only built
+        when they are accessed, and each one is built at most once.
+        :param variables: (list) names of the variables, in the order of the last axis of `exponents`.
+        :param exponents: (integer array) of shape (sets, pi terms, variables). Every pi term is a gcd-reduced
+                          integer exponent vector.
+        :param denominators: (integer array) of shape (sets, pi terms). The positive exponent of the non-repeating
+                             variable of every pi term; the rational exponents are exponents / denominators.
+        :param prefixed_dimensionless_terms: (list) names of the variables that were added as dimensionless. They
+                                             are appended to every set.
+        '''
+        self.__variables = tuple(variables)
+        self.__exponents = np.asarray(exponents, dtype=np.int64)
+        self.__denominators = np.asarray(denominators, dtype=np.int64)
+        self.__prefixed_dimensionless_terms = tuple(prefixed_dimensionless_terms)
+
+        self.__symbols = {}
+        self.__terms = {}
+        self.__latex = {}
+        self.__pi_terms = None
+
+    @property
+    def variables(self):
+        return self.__variables
+
+    @property
+    def exponents(self):
+        return self.__exponents
+
+    @property
+    def denominators(self):
+        return self.__denominators
+
+    @property
+    def prefixed_dimensionless_terms(self):
+        return self.__prefixed_dimensionless_terms
+
+    @property
+    def num_sets(self):
+        return self.__exponents.shape[0]
+
+    @property
+    def num_terms(self):
+        '''
+        number of dimensionless groups per set, including the prefixed dimensionless ones.
+        '''
+        return self.__exponents.shape[1] + len(self.__prefixed_dimensionless_terms)
+
+    def __len__(self):
+        return self.num_sets
+
+    def __symbol(self, name):
+        if name not in self.__symbols:
+            self.__symbols[name] = sp.symbols(name)
+        return self.__symbols[name]
+
+    def term(self, set_index: int, term_index: int):
+        '''
+        Return the SymPy expression of one pi term.
+        :param set_index: (int) index of the set.
+        :param term_index: (int) index of the pi term within the set.
+        '''
+        key = (set_index, term_index)
+        if key not in self.__terms:
+            num_solved = self.__exponents.shape[1]
+            if term_index >= num_solved:
+                expr = self.__symbol(self.__prefixed_dimensionless_terms[term_index - num_solved])
+            else:
+                denominator = int(self.__denominators[set_index, term_index])
+                expr = 1
+                for var_idx, power in enumerate(self.__exponents[set_index, term_index].tolist()):
+                    if power != 0:
+                        expr *= self.__symbol(self.__variables[var_idx]) ** sp.Rational(power, denominator)
+            self.__terms[key] = expr
+        return self.__terms[key]
+
+    def latex(self, set_index: int, term_index: int):
+        '''
+        Return the LaTeX string of one pi term.
+        :param set_index: (int) index of the set.
+        :param term_index: (int) index of the pi term within the set.
+        '''
+        key = (set_index, term_index)
+        if key not in self.__latex:
+            self.__latex[key] = sp.latex(self.term(set_index, term_index))
+        return self.__latex[key]
+
+    @property
+    def pi_terms(self):
+        '''
+        all the sets of pi terms as lists of SymPy expressions.
+        '''
+        if self.__pi_terms is None:
+            self.__pi_terms = [[self.term(set_index, term_index) for term_index in range(self.num_terms)]
+                               for set_index in range(self.num_sets)]
+        return self.__pi_terms
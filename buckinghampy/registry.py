@@ -0,0 +1,119 @@
+"""registry.py: compact storage of the variables of a problem and of their dimension matrix."""
+
+__author__ = "Mokbel Karam"
+__copyright__ = "Copyright (c) 2021, Mokbel Karam"
+
+__credits__ = ["University of Utah Department of Chemical Engineering"]
+__license__ = "MIT"
+__version__ = "1.0.4"
+__maintainer__ = "Mokbel Karam and Tony Saad"
+__email__ = "saadtony@gmail.com"
+__status__ = "Production"
+
+import numpy as np
+
+_EXPONENT_DTYPE = np.int16
+
+
+class VariableRegistry:
+    '''
+    Variables of a problem, stored as an int-indexed name table and a preallocated integer exponent matrix with one
+    row per fundamental dimension and one column per variable. The matrix is filled when a variable is added, so
+    the dimension matrix of the problem is a view of it rather than a rebuild.
+    '''
+    __slots__ = ('names', 'index', 'dims', 'dim_index', '_matrix')
+
+    def __init__(self, num_dims=4, num_vars=16):
+        self.names = []  # variable name of every column
+        self.index = {}  # variable name -> column
+        self.dims = []  # fundamental dimension of every row, in order of first use
+        self.dim_index = {}  # fundamental dimension -> row
+        self._matrix = np.zeros((num_dims, num_vars), dtype=_EXPONENT_DTYPE)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    @property
+    def matrix(self):
+        '''
+        read-only int16 view of the exponent matrix, of shape (fundamental dimensions, variables). The view shares
+        the storage of the registry, so later updates of the variables show through it; copy it to keep a snapshot.
+        '''
+        view = self._matrix[:len(self.dims), :len(self.names)]
+        view.flags.writeable = False
+        return view
+
+    def __reserve(self, num_dims, num_vars):
+        rows, cols = self._matrix.shape
+        if num_dims <= rows and num_vars <= cols:
+            return
+        grown = np.zeros((max(num_dims, 2 * rows), max(num_vars, 2 * cols)), dtype=_EXPONENT_DTYPE)
+        grown[:rows, :cols] = self._matrix
+        self._matrix = grown
+
+    def __fill(self, col, exponents):
+        limits = np.iinfo(_EXPONENT_DTYPE)
+        for dim, exponent in exponents.items():
+            if not limits.min < exponent <= limits.max:
+                raise Exception('the exponent {} of {} is out of range.'.format(exponent, dim))
+        for dim in exponents:
+            if dim not in self.dim_index:
+                self.__reserve(len(self.dims) + 1, len(self.names))
+                self.dim_index[dim] = len(self.dims)
+                self.dims.append(dim)
+        self._matrix[:, col] = 0
+        for dim, exponent in exponents.items():
+            self._matrix[self.dim_index[dim], col] = exponent
+
+    def __drop_unused_dims(self):
+        used = np.any(self.matrix != 0, axis=1)
+        if used.all():
+            return
+        keep = np.nonzero(used)[0]
+        self._matrix[:len(keep), :] = self._matrix[keep, :]
+        self._matrix[len(keep):len(self.dims), :] = 0
+        self.dims = [self.dims[row] for row in keep]
+        self.dim_index = {dim: row for row, dim in enumerate(self.dims)}
+
+    def add(self, name, exponents):
+        '''
+        Append a variable, given the exponents of its fundamental dimensions as a dict.
+        '''
+        if name in self.index:
+            raise Exception("the variable {} already exists.".format(name))
+        col = len(self.names)
+        self.__reserve(len(self.dims), col + 1)
+        self.names.append(name)
+        self.index[name] = col
+        self.__fill(col, exponents)
+        return col
+
+    def update(self, name, exponents):
+        '''
+        Replace the exponents of a variable, keeping its column.
+        '''
+        self.__fill(self.index[name], exponents)
+        self.__drop_unused_dims()
+
+    def remove(self, name):
+        '''
+        Remove a variable; the columns after it shift left, and dimensions that are no longer used are dropped.
+        '''
+        col = self.index.pop(name)
+        num_vars = len(self.names)
+        self._matrix[:, col:num_vars - 1] = self._matrix[:, col + 1:num_vars]
+        self._matrix[:, num_vars - 1] = 0
+        del self.names[col]
+        for idx in range(col, num_vars - 1):
+            self.index[self.names[idx]] = idx
+        self.__drop_unused_dims()
+
+    def exponents(self, name):
+        '''
+        Exponents of the fundamental dimensions of a variable, as a dict without the zero ones.
+        '''
+        column = self.matrix[:, self.index[name]].tolist()
+        return {dim: exponent for dim, exponent in zip(self.dims, column) if exponent != 0}
@@ -0,0 +1,42 @@
+"""test_import.py: checks that importing buckinghampy stays within its import-time budget and loads only NumPy."""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+BUDGET = 0.5  # seconds, for the best of a few imports
+
+# modules that must only be imported on first use
+LAZY_MODULES = ['sympy', 'scipy', 'tabulate', 'IPython', 'ipywidgets']
+
+PROBE = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import buckinghampy
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+'''
+
+
+def import_in_fresh_interpreter():
+    probe = PROBE.format(root=ROOT, lazy=LAZY_MODULES)
+    output = subprocess.run([sys.executable, '-c', probe], check=True, stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+    return json.loads(output)
+
+
+def test_import_is_light():
+    runs = [import_in_fresh_interpreter() for _ in range(3)]
+    for run in runs:
+        assert run['loaded'] == []
+    assert min(run['seconds'] for run in runs) < BUDGET
+
+
+def test_gui_class_is_the_real_one():
+    from buckinghampy import BuckinghamPiGui
+    from buckinghampy.buckinghampigui import BuckinghamPiGui as GuiClass
+    assert BuckinghamPiGui is GuiClass
@@ -0,0 +1,92 @@
+"""test_solve_cache.py: checks that editing a problem in place gives the same pi terms as building it from scratch."""
+
+import random
+from itertools import islice
+
+import pytest
+
+from buckinghampy import BuckinghamPi
+
+DIMS = ['m', 'l', 't', 'K']
+
+
+def random_dimensions(rnd, num_dims):
+    exponents = [rnd.choice([-2, -1, 0, 0, 1, 2]) for _ in range(num_dims)]
+    if not any(exponents):
+        exponents[rnd.randrange(num_dims)] = 1
+    return '*'.join('{}^({})'.format(DIMS[k], e) for k, e in enumerate(exponents) if e)
+
+
+def make_problem(spec, flagged, max_sets, search='lexicographic'):
+    problem = BuckinghamPi()
+    problem.flagged_var_max_sets = max_sets
+    problem.repeating_set_search = search
+    for name, dimensions in spec:
+        problem.add_variable(name, dimensions, non_repeating=(name == flagged))
+    return problem
+
+
+def solve(problem, exact):
+    try:
+        result = problem.generate_pi_terms(exact=exact)
+    except Exception as e:
+        return str(e)
+    return result.variables, result.exponents.tolist(), result.denominators.tolist()
+
+
+def stream(problem, exact, limit=None):
+    pi_term_sets = problem.iter_pi_terms(exact=exact, reuse=True)
+    try:
+        return list(islice(pi_term_sets, limit))
+    except Exception as e:
+        return str(e)
+    finally:
+        pi_term_sets.close()
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_edits_match_fresh_problem(seed):
+    rnd = random.Random(seed)
+    num_dims = rnd.randint(2, 3)
+    max_sets = rnd.choice([-1, -1, 3, 5, 20])
+    search = rnd.choice(['lexicographic', 'lexicographic', 'ranked'])
+    exact = rnd.random() < 0.3
+    spec = [('x{}'.format(i), random_dimensions(rnd, num_dims)) for i in range(rnd.randint(num_dims + 2, 8))]
+    flagged = rnd.choice([None, None, spec[-1][0]])
+    counter = len(spec)
+
+    problem = make_problem(spec, flagged, max_sets, search)
+    for step in range(8):
+        if rnd.random() < 0.3:
+            # a streamed solve through the same cache, sometimes stopped after its first set
+            limit = rnd.choice([1, None])
+            assert stream(problem, exact, limit) == stream(make_problem(spec, flagged, max_sets, search), exact, limit)
+        assert solve(problem, exact) == solve(make_problem(spec, flagged, max_sets, search), exact), step
+
+        op = rnd.choice(['update', 'update', 'add', 'remove', 'none'])
+        if op == 'update':
+            i = rnd.randrange(len(spec))
+            spec[i] = (spec[i][0], random_dimensions(rnd, num_dims))
+            problem.update_variable(*spec[i])
+        elif op == 'add':
+            spec.append(('x{}'.format(counter), random_dimensions(rnd, rnd.choice([num_dims, num_dims + 1]))))
+            counter += 1
+            problem.add_variable(*spec[-1])
+        elif op == 'remove' and len(spec) > num_dims + 2:
+            name = spec.pop(rnd.randrange(len(spec)))[0]
+            problem.remove_variable(name)
+            if name == flagged:
+                flagged = None
+
+
+def test_failed_update_leaves_problem_unchanged():
+    spec = [('rho', 'm*l^(-3)'), ('u', 'l/t'), ('d', 'l'), ('mu', 'm/(l*t)')]
+    problem = make_problem(spec, 'mu', 20)
+    problem.add_variable('Re', '1')
+    expected = solve(problem, False)
+
+    with pytest.raises(Exception):
+        problem.update_variable('Re', 'l', non_repeating=True)
+    with pytest.raises(Exception):
+        problem.update_variable('Re', 'l^(1/2)')
+    assert solve(problem, False) == expected